@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+API 依赖注入
+将核心服务封装为 FastAPI 依赖，同一请求内复用实例，并便于测试时覆盖
+"""
+from fastapi import Depends
+from sqlalchemy.orm import Session
+
+from app.models.database import get_db
+from app.core.profile_manager import ProfileManager
+from app.core.evidence_pack import EvidencePackGenerator
+from app.core.ingestion import VideoIngestionService
+from app.core.llm_client import LLMReportGenerator
+
+
+def get_profile_manager(db: Session = Depends(get_db)) -> ProfileManager:
+    """获取用户档案管理器"""
+    return ProfileManager(db)
+
+
+def get_evidence_pack_generator(db: Session = Depends(get_db)) -> EvidencePackGenerator:
+    """获取 EvidencePack 生成器"""
+    return EvidencePackGenerator(db)
+
+
+def get_ingestion_service(db: Session = Depends(get_db)) -> VideoIngestionService:
+    """获取视频摄取服务"""
+    return VideoIngestionService(db)
+
+
+def get_llm_report_generator(db: Session = Depends(get_db)) -> LLMReportGenerator:
+    """获取 LLM 报告生成器（共享全局千问客户端的连接池）"""
+    return LLMReportGenerator(db)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP 中间件
+为 GET 响应生成 ETag，并支持 If-None-Match 条件请求
+"""
+import hashlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class ETagMiddleware:
+    """
+    ETag 中间件（纯 ASGI 实现）
+
+    对状态码 200 的 GET JSON 响应计算内容摘要作为 ETag；
+    客户端携带匹配的 If-None-Match 时返回 304，不发送响应体。
+
+    响应体需完整缓冲后才能计算摘要，因此只处理声明了 Content-Length 且不超过
+    max_body_size 的 JSON 响应；流式响应、大响应（如证据包）与非 JSON 响应
+    （如 /docs）直接透传，不增加首字节延迟与峰值内存。
+    """
+
+    # 默认缓冲上限（256KB）
+    DEFAULT_MAX_BODY_SIZE = 256 * 1024
+
+    def __init__(self, app: ASGIApp, max_body_size: int = DEFAULT_MAX_BODY_SIZE):
+        self.app = app
+        self.max_body_size = max_body_size
+
+    @staticmethod
+    def _compute_etag(body: bytes) -> str:
+        return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+    def _should_buffer(self, message: Message) -> bool:
+        """仅缓冲 200、JSON 且 Content-Length 不超过上限的响应"""
+        if message["status"] != 200:
+            return False
+        headers = Headers(raw=message.get("headers", []))
+        if not headers.get("content-type", "").startswith("application/json"):
+            return False
+        content_length = headers.get("content-length")
+        return content_length is not None and content_length.isdigit() \
+            and int(content_length) <= self.max_body_size
+
+    @staticmethod
+    def _etag_matches(if_none_match: str, etag: str) -> bool:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = (tag.strip() for tag in if_none_match.split(","))
+        return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = Headers(scope=scope).get("if-none-match")
+        start_message: Message = {}
+        body_parts = []
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                # 仅处理小体积的 200 JSON 响应，其余直接透传
+                if not self._should_buffer(message):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body_parts.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(body_parts)
+            etag = self._compute_etag(body)
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["ETag"] = etag
+
+            if if_none_match and self._etag_matches(if_none_match, etag):
+                for name in ("content-length", "content-type"):
+                    if name in headers:
+                        del headers[name]
+                start_message["status"] = 304
+                await send(start_message)
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -3,12 +3,12 @@
 用户档案扩展 API
 包含用户事件、关注点、时间轴等端点
 """
+import functools
+import sys
 from datetime import datetime
 from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
 
-from app.models.database import get_db
 from app.models.schemas import (
     UserEventCreateRequest,
     UserEventResponse,
@@ -23,35 +23,69 @@ from app.models.schemas import (
     MessageResponse
 )
 from app.core.profile_manager import ProfileManager
+from app.api.dependencies import get_profile_manager
+from app.services.cache import response_cache
+
+try:
+    # 可选依赖：C 实现的 ISO 8601 解析器，原生支持结尾的 Z
+    from ciso8601 import parse_datetime as _fast_parse_iso
+except ImportError:
+    _fast_parse_iso = None
+
+if sys.version_info >= (3, 11):
+    # 3.11+ 标准库原生支持结尾的 Z，无需改写字符串
+    _stdlib_parse_iso = datetime.fromisoformat
+else:
+    def _stdlib_parse_iso(s: str) -> datetime:
+        if s.endswith("Z"):
+            s = s[:-1] + "+00:00"
+        return datetime.fromisoformat(s)
 
 router = APIRouter()
 
+# 合法取值白名单（与数据库 CHECK 约束一致），在访问数据库前拦截非法参数
+_EVENT_TYPES = frozenset(ProfileManager.EVENT_TYPE_DISPLAY_MAP)
+_CONCERN_STATUSES = frozenset({"active", "resolved", "monitoring"})
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_iso(s: str) -> datetime:
+    """
+    解析 ISO 8601 日期字符串（兼容结尾的 Z）
+
+    优先使用 ciso8601，未安装时回退到标准库。
+    轮询类请求常重复携带相同的日期参数，结果按字符串缓存。
+    解析失败时抛出 ValueError，由调用方转换为 400 响应。
+    """
+    if _fast_parse_iso is not None:
+        return _fast_parse_iso(s)
+    return _stdlib_parse_iso(s)
+
 
 # ========================================
 # 扩展档案
 # ========================================
 
 @router.get("/user/{user_id}/profile/extended", response_model=ExtendedUserProfileResponse)
-async def get_extended_user_profile(user_id: str, db: Session = Depends(get_db)):
+@response_cache.cached("extended")
+def get_extended_user_profile(user_id: str, profile_mgr: ProfileManager = Depends(get_profile_manager)):
     """
     获取用户扩展档案
 
     包含基础档案信息、活跃关注点数量、近期事件数量等。
     """
-    profile_mgr = ProfileManager(db)
     extended_profile = profile_mgr.get_extended_profile(user_id)
 
-    # 转换基线信息
-    baseline_zones = []
-    baseline_zone_map = extended_profile.get("baseline_zone_map", {})
-    for zone_id_str, session_id in baseline_zone_map.items():
-        baseline_zones.append(
-            BaselineZoneInfo(
-                zone_id=int(zone_id_str),
-                session_id=str(session_id),
-                completed_at=extended_profile.get("updated_at", "")
-            )
+    # 转换基线信息（完成时间统一取档案更新时间，循环外取一次）
+    completed_at = extended_profile.get("updated_at", "")
+    baseline_zones = [
+        BaselineZoneInfo.model_construct(
+            zone_id=int(zone_id_str),
+            session_id=str(session_id),
+            completed_at=completed_at
         )
+        for zone_id_str, session_id in extended_profile.get("baseline_zone_map", {}).items()
+    ]
 
     return ExtendedUserProfileResponse(
         user_id=extended_profile["user_id"],
@@ -74,10 +108,11 @@ async def get_extended_user_profile(user_id: str, db: Session = Depends(get_db))
 # ========================================
 
 @router.post("/user/{user_id}/events", response_model=UserEventResponse)
-async def create_user_event(
+@response_cache.invalidates
+def create_user_event(
     user_id: str,
     request: UserEventCreateRequest,
-    db: Session = Depends(get_db)
+    profile_mgr: ProfileManager = Depends(get_profile_manager)
 ):
     """
     记录用户事件
@@ -93,10 +128,11 @@ async def create_user_event(
     - checkup: 口腔检查
     - other: 其他
     """
-    profile_mgr = ProfileManager(db)
+    if request.event_type not in _EVENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"无效的事件类型: {request.event_type}")
 
     try:
-        event_date = datetime.fromisoformat(request.event_date.replace("Z", "+00:00"))
+        event_date = _parse_iso(request.event_date)
     except ValueError:
         raise HTTPException(status_code=400, detail="无效的日期格式，请使用 ISO 8601 格式")
 
@@ -109,46 +145,38 @@ async def create_user_event(
         metadata=request.metadata
     )
 
-    return UserEventResponse(
-        id=str(event.id),
-        user_id=event.user_id,
-        event_type=event.event_type,
-        event_date=str(event.event_date.isoformat()),
-        event_description=event.event_description,
-        related_session_id=str(event.related_session_id) if event.related_session_id else None,
-        metadata=event.event_metadata or {},
-        created_at=str(event.created_at.isoformat())
-    )
+    return UserEventResponse.from_orm_row(event)
 
 
 @router.get("/user/{user_id}/events", response_model=UserEventListResponse)
-async def get_user_events(
+def get_user_events(
     user_id: str,
     start_date: Optional[str] = Query(None, description="开始日期（ISO 8601格式）"),
     end_date: Optional[str] = Query(None, description="结束日期（ISO 8601格式）"),
     event_type: Optional[str] = Query(None, description="事件类型过滤"),
     limit: int = Query(50, ge=1, le=200, description="返回数量限制"),
-    db: Session = Depends(get_db)
+    profile_mgr: ProfileManager = Depends(get_profile_manager)
 ):
     """
     获取用户事件列表
 
     支持按日期范围和事件类型过滤。
     """
-    profile_mgr = ProfileManager(db)
+    if event_type and event_type not in _EVENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"无效的事件类型: {event_type}")
 
     parsed_start = None
     parsed_end = None
 
     if start_date:
         try:
-            parsed_start = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
+            parsed_start = _parse_iso(start_date)
         except ValueError:
             raise HTTPException(status_code=400, detail="无效的开始日期格式")
 
     if end_date:
         try:
-            parsed_end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
+            parsed_end = _parse_iso(end_date)
         except ValueError:
             raise HTTPException(status_code=400, detail="无效的结束日期格式")
 
@@ -160,19 +188,7 @@ async def get_user_events(
         limit=limit
     )
 
-    events_response = [
-        UserEventResponse(
-            id=str(event.id),
-            user_id=event.user_id,
-            event_type=event.event_type,
-            event_date=str(event.event_date.isoformat()),
-            event_description=event.event_description,
-            related_session_id=str(event.related_session_id) if event.related_session_id else None,
-            metadata=event.event_metadata or {},
-            created_at=str(event.created_at.isoformat())
-        )
-        for event in events
-    ]
+    events_response = [UserEventResponse.from_orm_row(event) for event in events]
 
     return UserEventListResponse(
         events=events_response,
@@ -181,15 +197,15 @@ async def get_user_events(
 
 
 @router.delete("/user/{user_id}/events/{event_id}", response_model=MessageResponse)
-async def delete_user_event(
+@response_cache.invalidates
+def delete_user_event(
     user_id: str,
     event_id: str,
-    db: Session = Depends(get_db)
+    profile_mgr: ProfileManager = Depends(get_profile_manager)
 ):
     """
     删除用户事件
     """
-    profile_mgr = ProfileManager(db)
     success = profile_mgr.delete_user_event(event_id)
 
     if not success:
@@ -203,18 +219,17 @@ async def delete_user_event(
 # ========================================
 
 @router.post("/user/{user_id}/concerns", response_model=ConcernPointResponse)
-async def create_concern_point(
+@response_cache.invalidates
+def create_concern_point(
     user_id: str,
     request: ConcernPointCreateRequest,
-    db: Session = Depends(get_db)
+    profile_mgr: ProfileManager = Depends(get_profile_manager)
 ):
     """
     上报用户关注点
 
     关注点可以是用户自己发现的口腔问题，也可以是系统检测到的。
     """
-    profile_mgr = ProfileManager(db)
-
     concern = profile_mgr.add_concern_point(
         user_id=user_id,
         concern_type=request.concern_type,
@@ -225,39 +240,24 @@ async def create_concern_point(
         severity=request.severity
     )
 
-    return ConcernPointResponse(
-        id=str(concern.id),
-        user_id=concern.user_id,
-        source_type=concern.source_type,
-        zone_id=concern.zone_id,
-        location_description=concern.location_description,
-        concern_type=concern.concern_type,
-        concern_description=concern.concern_description,
-        severity=concern.severity,
-        status=concern.status,
-        first_detected_at=str(concern.first_detected_at.isoformat()),
-        last_observed_at=str(concern.last_observed_at.isoformat()),
-        resolved_at=str(concern.resolved_at.isoformat()) if concern.resolved_at else None,
-        related_sessions=concern.related_sessions or [],
-        evidence_frame_ids=concern.evidence_frame_ids or [],
-        created_at=str(concern.created_at.isoformat()),
-        updated_at=str(concern.updated_at.isoformat()) if concern.updated_at else str(concern.created_at.isoformat())
-    )
+    return ConcernPointResponse.from_orm_row(concern)
 
 
 @router.get("/user/{user_id}/concerns", response_model=ConcernPointListResponse)
-async def get_user_concerns(
+@response_cache.cached("concerns")
+def get_user_concerns(
     user_id: str,
     status: Optional[str] = Query(None, description="状态过滤：active/resolved/monitoring"),
     limit: int = Query(50, ge=1, le=200, description="返回数量限制"),
-    db: Session = Depends(get_db)
+    profile_mgr: ProfileManager = Depends(get_profile_manager)
 ):
     """
     获取用户关注点列表
 
     支持按状态过滤。
     """
-    profile_mgr = ProfileManager(db)
+    if status and status not in _CONCERN_STATUSES:
+        raise HTTPException(status_code=400, detail=f"无效的关注点状态: {status}")
 
     concerns = profile_mgr.get_all_concerns(
         user_id=user_id,
@@ -265,27 +265,7 @@ async def get_user_concerns(
         limit=limit
     )
 
-    concerns_response = [
-        ConcernPointResponse(
-            id=str(concern.id),
-            user_id=concern.user_id,
-            source_type=concern.source_type,
-            zone_id=concern.zone_id,
-            location_description=concern.location_description,
-            concern_type=concern.concern_type,
-            concern_description=concern.concern_description,
-            severity=concern.severity,
-            status=concern.status,
-            first_detected_at=str(concern.first_detected_at.isoformat()),
-            last_observed_at=str(concern.last_observed_at.isoformat()),
-            resolved_at=str(concern.resolved_at.isoformat()) if concern.resolved_at else None,
-            related_sessions=concern.related_sessions or [],
-            evidence_frame_ids=concern.evidence_frame_ids or [],
-            created_at=str(concern.created_at.isoformat()),
-            updated_at=str(concern.updated_at.isoformat()) if concern.updated_at else str(concern.created_at.isoformat())
-        )
-        for concern in concerns
-    ]
+    concerns_response = [ConcernPointResponse.from_orm_row(concern) for concern in concerns]
 
     return ConcernPointListResponse(
         concerns=concerns_response,
@@ -294,11 +274,12 @@ async def get_user_concerns(
 
 
 @router.patch("/user/{user_id}/concerns/{concern_id}/status", response_model=ConcernPointResponse)
-async def update_concern_status(
+@response_cache.invalidates
+def update_concern_status(
     user_id: str,
     concern_id: str,
     request: ConcernStatusUpdateRequest,
-    db: Session = Depends(get_db)
+    profile_mgr: ProfileManager = Depends(get_profile_manager)
 ):
     """
     更新关注点状态
@@ -308,7 +289,8 @@ async def update_concern_status(
     - resolved: 已解决
     - monitoring: 持续监控中
     """
-    profile_mgr = ProfileManager(db)
+    if request.status not in _CONCERN_STATUSES:
+        raise HTTPException(status_code=400, detail=f"无效的关注点状态: {request.status}")
 
     concern = profile_mgr.update_concern_status(
         concern_id=concern_id,
@@ -319,24 +301,7 @@ async def update_concern_status(
     if not concern:
         raise HTTPException(status_code=404, detail="关注点不存在")
 
-    return ConcernPointResponse(
-        id=str(concern.id),
-        user_id=concern.user_id,
-        source_type=concern.source_type,
-        zone_id=concern.zone_id,
-        location_description=concern.location_description,
-        concern_type=concern.concern_type,
-        concern_description=concern.concern_description,
-        severity=concern.severity,
-        status=concern.status,
-        first_detected_at=str(concern.first_detected_at.isoformat()),
-        last_observed_at=str(concern.last_observed_at.isoformat()),
-        resolved_at=str(concern.resolved_at.isoformat()) if concern.resolved_at else None,
-        related_sessions=concern.related_sessions or [],
-        evidence_frame_ids=concern.evidence_frame_ids or [],
-        created_at=str(concern.created_at.isoformat()),
-        updated_at=str(concern.updated_at.isoformat()) if concern.updated_at else str(concern.created_at.isoformat())
-    )
+    return ConcernPointResponse.from_orm_row(concern)
 
 
 # ========================================
@@ -344,12 +309,13 @@ async def update_concern_status(
 # ========================================
 
 @router.get("/user/{user_id}/timeline", response_model=TimelineResponse)
-async def get_user_timeline(
+@response_cache.cached("timeline")
+def get_user_timeline(
     user_id: str,
     period: str = Query("month", description="查询周期：week/month/quarter/year/all"),
     start_date: Optional[str] = Query(None, description="自定义开始日期（ISO 8601格式）"),
     end_date: Optional[str] = Query(None, description="自定义结束日期（ISO 8601格式）"),
-    db: Session = Depends(get_db)
+    profile_mgr: ProfileManager = Depends(get_profile_manager)
 ):
     """
     获取用户时间轴
@@ -359,20 +325,18 @@ async def get_user_timeline(
     - 用户事件（洁牙、治疗等）
     - 关注点变化（发现、解决）
     """
-    profile_mgr = ProfileManager(db)
-
     parsed_start = None
     parsed_end = None
 
     if start_date:
         try:
-            parsed_start = datetime.fromisoformat(start_date.replace("Z", "+00:00"))
+            parsed_start = _parse_iso(start_date)
         except ValueError:
             raise HTTPException(status_code=400, detail="无效的开始日期格式")
 
     if end_date:
         try:
-            parsed_end = datetime.fromisoformat(end_date.replace("Z", "+00:00"))
+            parsed_end = _parse_iso(end_date)
         except ValueError:
             raise HTTPException(status_code=400, detail="无效的结束日期格式")
 
@@ -1,25 +1,26 @@
 # -*- coding: utf-8 -*-
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.models.database import get_db
 from app.models.schemas import ReportResponse
 from app.core.llm_client import LLMReportGenerator, LLMClientError
-from app.core.evidence_pack import EvidencePackGenerator
+from app.core.evidence_pack import EvidencePackGenerator, EvidencePackError
+from app.api.dependencies import get_evidence_pack_generator, get_llm_report_generator
 
 router = APIRouter()
 
 @router.post("/session/{session_id}/report", response_model=ReportResponse)
-async def generate_health_report(session_id: str, db: Session = Depends(get_db)):
+def generate_health_report(
+    session_id: str,
+    pack_gen: EvidencePackGenerator = Depends(get_evidence_pack_generator),
+    llm_gen: LLMReportGenerator = Depends(get_llm_report_generator)
+):
     """
     触发 LLM 生成报告 (同步调用，生产环境建议异步)
     """
     try:
         # 1. 获取证据包
-        pack_gen = EvidencePackGenerator(db)
         evidence_pack = pack_gen.get_evidence_pack_by_session(session_id)
         
         # 2. 生成报告
-        llm_gen = LLMReportGenerator(db)
         # 检查是否已有报告
         existing_report = llm_gen.get_report_by_session(session_id)
         if existing_report:
@@ -43,5 +44,12 @@ async def generate_health_report(session_id: str, db: Session = Depends(get_db))
             generated_at=str(report.created_at)
         )
         
+    except EvidencePackError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    except LLMClientError as e:
+        # 上游大模型服务失败
+        raise HTTPException(status_code=502, detail=str(e))
+
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
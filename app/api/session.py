@@ -4,15 +4,18 @@ from sqlalchemy.orm import Session
 from app.models.database import get_db, ASession
 from app.models.schemas import SessionStatusResponse
 from app.core.evidence_pack import EvidencePackGenerator, EvidencePackError
+from app.api.dependencies import get_evidence_pack_generator
 
 router = APIRouter()
 
 @router.get("/session/{session_id}/evidence-pack")
-async def get_evidence_pack_data(session_id: str, db: Session = Depends(get_db)):
+def get_evidence_pack_data(
+    session_id: str,
+    pack_gen: EvidencePackGenerator = Depends(get_evidence_pack_generator)
+):
     """
     获取已生成的 EvidencePack JSON 数据
     """
-    pack_gen = EvidencePackGenerator(db)
     try:
         pack = pack_gen.get_evidence_pack_by_session(session_id)
         return pack
@@ -20,7 +23,7 @@ async def get_evidence_pack_data(session_id: str, db: Session = Depends(get_db))
         raise HTTPException(status_code=404, detail=str(e))
 
 @router.get("/session/{session_id}/status", response_model=SessionStatusResponse)
-async def get_session_status_info(session_id: str, db: Session = Depends(get_db)):
+def get_session_status_info(session_id: str, db: Session = Depends(get_db)):
     """
     查询 Session 处理状态
     """
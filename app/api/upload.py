@@ -1,154 +1,257 @@
 # -*- coding: utf-8 -*-
-from fastapi import APIRouter, File, UploadFile, Form, Depends, HTTPException
+from fastapi import APIRouter, File, UploadFile, Form, Depends, HTTPException, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import Optional
-import shutil
-import tempfile
+from typing import Optional, Tuple
+import asyncio
+import hashlib
+import logging
 import os
 from pathlib import Path
+import aiofiles.tempfile
 
-from app.models.database import get_db
+from app.models.database import get_db, SessionLocal
 from app.models.schemas import UploadResponse
-from app.core.ingestion import VideoIngestionService
-from app.core.keyframe_extractor import KeyframeExtractor
-from app.core.evidence_pack import EvidencePackGenerator
+from app.core.ingestion import (
+    VideoIngestionService,
+    IngestionError,
+    VideoTooLargeError,
+    UnsupportedVideoError
+)
+from app.core.keyframe_extractor import KeyframeExtractor, ExtractionError
+from app.core.evidence_pack import EvidencePackGenerator, EvidencePackError
 from app.core.profile_manager import ProfileManager
+from app.api.dependencies import get_ingestion_service, get_profile_manager
+from app.services.storage import storage_service
+from app.services.cache import response_cache
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-@router.post("/upload/quick-check", response_model=UploadResponse)
+# 上传流分块大小（1MB）
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+
+async def _save_upload_to_temp(video_file: UploadFile) -> Tuple[str, str]:
+    """
+    将上传文件分块写入临时文件，返回 (临时文件路径, SHA-256)
+
+    逐块 await 读写，避免大视频的同步拷贝阻塞事件循环。
+    Hash 基于内存中的分块在线程池中计算（hashlib 对大块数据释放 GIL），与写盘并行，
+    不占用事件循环；摄取时无需再从磁盘读一遍。
+    临时文件建在数据根目录下，摄取时可直接 rename 进 B 流而无需二次拷贝。
+    """
+    suffix = Path(video_file.filename).suffix or ".mp4"
+    hasher = hashlib.sha256()
+    async with aiofiles.tempfile.NamedTemporaryFile(
+        "wb", delete=False, suffix=suffix, dir=storage_service.tmp
+    ) as tmp:
+        while chunk := await video_file.read(UPLOAD_CHUNK_SIZE):
+            await asyncio.gather(run_in_threadpool(hasher.update, chunk), tmp.write(chunk))
+        return tmp.name, hasher.hexdigest()
+
+
+def _ingest_upload(db: Session, ingestion: VideoIngestionService, **ingest_kwargs) -> Tuple[str, str]:
+    """
+    摄取上传视频，返回 (session_id, B 流文件路径)
+
+    须在线程池中调用：ingest_video 提交后 ORM 对象已过期，读取属性会触发刷新查询，
+    因此在同一线程内取出纯值返回；失败时的回滚也在此完成，事件循环上不做数据库 I/O。
+    """
+    try:
+        b_video, a_session = ingestion.ingest_video(**ingest_kwargs)
+        return str(a_session.id), b_video.file_path
+    except IngestionError:
+        raise
+    except Exception:
+        db.rollback()
+        raise
+
+
+def _process_session(session_id: str, video_path: str, user_id: str, zone_id: Optional[int] = None):
+    """
+    后台处理管道：抽帧 → 生成证据包 → 更新用户档案
+
+    在线程池中运行并使用独立的数据库会话（请求会话在响应返回后即关闭）。
+    zone_id 为空表示 Quick Check，否则为对应分区的基线采集。
+    """
+    db = SessionLocal()
+    ingestion = VideoIngestionService(db)
+    try:
+        # processing 状态单独提交，供客户端轮询可见
+        ingestion.update_session_status(session_id, "processing")
+
+        # 以下步骤只 flush 不提交，成功后一次性提交，失败时整体回滚
+        # 1. 智能抽帧
+        logger.info("[抽帧] 开始处理 Session: %s", session_id)
+        extractor = KeyframeExtractor(db)
+        extractor.extract_keyframes(session_id, video_path, commit=False)
+
+        # 2. 生成证据包
+        pack_gen = EvidencePackGenerator(db)
+        pack_gen.generate_evidence_pack(session_id, commit=False)
+
+        # 3. 更新状态
+        ingestion.update_session_status(session_id, "completed", commit=False)
+
+        # 4. 更新用户档案
+        profile_mgr = ProfileManager(db)
+        if zone_id is None:
+            profile_mgr.record_quick_check(user_id, commit=False)
+        else:
+            profile_mgr.mark_baseline_completed(user_id, zone_id, session_id, commit=False)
+
+        db.commit()
+
+    except (ExtractionError, EvidencePackError) as e:
+        # 预期内的管道失败：记录原因即可，无需完整堆栈
+        logger.error("[处理] Session %s 处理失败: %s", session_id, e)
+        _mark_session_failed(db, ingestion, session_id, e)
+
+    except Exception as e:
+        logger.exception("[处理] Session %s 处理失败", session_id)
+        _mark_session_failed(db, ingestion, session_id, e)
+
+    finally:
+        db.close()
+
+
+def _mark_session_failed(db: Session, ingestion: VideoIngestionService, session_id: str, error: Exception):
+    """回滚未提交的处理结果，并将 Session 标记为 failed"""
+    # [关键修正] 遇到错误必须先回滚，否则后续 DB 操作会报 PendingRollbackError
+    db.rollback()
+
+    try:
+        ingestion.update_session_status(session_id, "failed", str(error))
+    except Exception:
+        # 状态未能持久化，Session 将停留在 processing，必须在日志中留下完整堆栈
+        logger.exception("[严重] 无法更新 Session 失败状态: session_id=%s", session_id)
+
+
+async def _process_session_task(session_id: str, video_path: str, user_id: str, zone_id: Optional[int] = None):
+    """后台任务入口：CPU 密集的管道放入线程池，完成后失效用户缓存"""
+    await run_in_threadpool(_process_session, session_id, video_path, user_id, zone_id)
+    await response_cache.invalidate_user(user_id)
+
+
+@router.post("/upload/quick-check", response_model=UploadResponse, status_code=202)
 async def upload_quick_check(
+    background_tasks: BackgroundTasks,
     video_file: UploadFile = File(...),
     user_id: str = Form(...),
     user_text: Optional[str] = Form(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    ingestion: VideoIngestionService = Depends(get_ingestion_service)
 ):
     """
     上传每日检查视频 (Quick Check)
+
+    视频摄取完成后立即返回 202，抽帧与证据包生成在后台执行，
+    客户端通过 /session/{session_id}/status 轮询处理进度。
     """
-    suffix = Path(video_file.filename).suffix or ".mp4"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        shutil.copyfileobj(video_file.file, tmp)
-        tmp_path = tmp.name
+    tmp_path, file_hash = await _save_upload_to_temp(video_file)
 
-    session_id = None
     try:
-        # 1. 摄取视频
-        ingestion = VideoIngestionService(db)
-        b_video, a_session = ingestion.ingest_video(
-            video_file_data=None, 
-            temp_file_path=tmp_path, 
+        session_id, video_path = await run_in_threadpool(
+            _ingest_upload,
+            db,
+            ingestion,
+            video_file_data=None,
+            temp_file_path=tmp_path,
+            file_hash=file_hash,
             user_id=user_id,
             session_type="quick_check",
             user_description=user_text
         )
-        session_id = str(a_session.id)
-        ingestion.update_session_status(session_id, "processing")
-        
-        # 2. 智能抽帧
-        print(f"[抽帧] 开始处理 Session: {session_id}")
-        extractor = KeyframeExtractor(db)
-        extractor.extract_keyframes(session_id, b_video.file_path)
-        
-        # 3. 生成证据包
-        pack_gen = EvidencePackGenerator(db)
-        pack_gen.generate_evidence_pack(session_id)
-        
-        # 4. 更新状态
-        ingestion.update_session_status(session_id, "completed")
-        
-        # 5. 更新用户档案
-        profile_mgr = ProfileManager(db)
-        profile_mgr.record_quick_check(user_id)
 
-        return UploadResponse(
-            session_id=session_id,
-            status="completed",
-            message="Quick check processed successfully"
-        )
+    except VideoTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        
-        # [关键修正] 遇到错误必须先回滚，否则后续 DB 操作会报 PendingRollbackError
-        db.rollback()
-        
-        if session_id:
-            try:
-                ingestion = VideoIngestionService(db)
-                ingestion.update_session_status(session_id, "failed", str(e))
-            except Exception as e2:
-                print(f"[严重] 无法更新 Session 失败状态: {e2}")
-        
+    except UnsupportedVideoError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    except IngestionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except OSError as e:
+        logger.exception("[上传] 视频文件读写失败: user=%s", user_id)
         raise HTTPException(status_code=500, detail=str(e))
-        
+
+    except Exception:
+        logger.exception("[上传] 未预期的摄取错误: user=%s", user_id)
+        raise
+
     finally:
         if os.path.exists(tmp_path):
             os.unlink(tmp_path)
 
+    background_tasks.add_task(_process_session_task, session_id, video_path, user_id)
+
+    return UploadResponse(
+        session_id=session_id,
+        status="pending",
+        message="Quick check accepted, processing in background"
+    )
+
 
-@router.post("/upload/baseline", response_model=UploadResponse)
+@router.post("/upload/baseline", response_model=UploadResponse, status_code=202)
 async def upload_baseline(
+    background_tasks: BackgroundTasks,
     video_file: UploadFile = File(...),
     user_id: str = Form(...),
     zone_id: int = Form(..., ge=1, le=7),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    ingestion: VideoIngestionService = Depends(get_ingestion_service),
+    profile_mgr: ProfileManager = Depends(get_profile_manager)
 ):
     """
     上传基线视频 (Baseline)
+
+    视频摄取完成后立即返回 202，处理完成后该分区计入基线进度；
+    返回的 baseline_progress 为受理时已完成的分区数，不含本次待处理的分区。
     """
-    suffix = Path(video_file.filename).suffix or ".mp4"
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-        shutil.copyfileobj(video_file.file, tmp)
-        tmp_path = tmp.name
+    tmp_path, file_hash = await _save_upload_to_temp(video_file)
 
-    session_id = None
     try:
-        ingestion = VideoIngestionService(db)
-        b_video, a_session = ingestion.ingest_video(
+        session_id, video_path = await run_in_threadpool(
+            _ingest_upload,
+            db,
+            ingestion,
             video_file_data=None,
             temp_file_path=tmp_path,
+            file_hash=file_hash,
             user_id=user_id,
             session_type="baseline",
             zone_id=zone_id
         )
-        session_id = str(a_session.id)
-        ingestion.update_session_status(session_id, "processing")
-        
-        print(f"[抽帧] 开始处理 Baseline Session: {session_id}")
-        extractor = KeyframeExtractor(db)
-        extractor.extract_keyframes(session_id, b_video.file_path)
-        
-        pack_gen = EvidencePackGenerator(db)
-        pack_gen.generate_evidence_pack(session_id)
-        
-        ingestion.update_session_status(session_id, "completed")
 
-        profile_mgr = ProfileManager(db)
-        profile_mgr.mark_baseline_completed(user_id, zone_id, session_id)
-        
-        profile = profile_mgr.get_or_create_profile(user_id)
-        completed_count = len(profile.baseline_zone_map or {})
-
-        return UploadResponse(
-            session_id=session_id,
-            status="completed",
-            message=f"Baseline zone {zone_id} processed",
-            baseline_progress=f"{completed_count}/7"
-        )
+    except VideoTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
 
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
-        db.rollback() # 回滚
-        if session_id:
-            try:
-                ingestion = VideoIngestionService(db)
-                ingestion.update_session_status(session_id, "failed", str(e))
-            except:
-                pass
+    except UnsupportedVideoError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    except IngestionError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except OSError as e:
+        logger.exception("[上传] 视频文件读写失败: user=%s", user_id)
         raise HTTPException(status_code=500, detail=str(e))
+
+    except Exception:
+        logger.exception("[上传] 未预期的摄取错误: user=%s", user_id)
+        raise
+
     finally:
         if os.path.exists(tmp_path):
-            os.unlink(tmp_path)
\ No newline at end of file
+            os.unlink(tmp_path)
+
+    completed_count = await run_in_threadpool(profile_mgr.get_baseline_progress, user_id)
+    background_tasks.add_task(_process_session_task, session_id, video_path, user_id, zone_id)
+
+    return UploadResponse(
+        session_id=session_id,
+        status="pending",
+        message=f"Baseline zone {zone_id} accepted, processing in background",
+        baseline_progress=f"{completed_count}/7"
+    )
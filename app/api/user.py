@@ -1,33 +1,30 @@
 # -*- coding: utf-8 -*-
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.models.database import get_db
 from app.models.schemas import UserProfileResponse, BaselineZoneInfo
 from app.core.profile_manager import ProfileManager
+from app.api.dependencies import get_profile_manager
 
 router = APIRouter()
 
 @router.get("/user/{user_id}/profile", response_model=UserProfileResponse)
-async def get_user_profile(user_id: str, db: Session = Depends(get_db)):
+def get_user_profile(user_id: str, profile_mgr: ProfileManager = Depends(get_profile_manager)):
     """
     获取用户完整档案
     """
-    profile_mgr = ProfileManager(db)
     profile = profile_mgr.get_or_create_profile(user_id)
 
     # 转换基线信息格式
-    baseline_zones = []
-    if profile.baseline_zone_map:
-        for zone_id_str, session_id in profile.baseline_zone_map.items():
-            # 这里简化处理，实际可以通过session_id查具体的完成时间
-            # V1阶段使用profile更新时间或session创建时间
-            baseline_zones.append(
-                BaselineZoneInfo(
-                    zone_id=int(zone_id_str),
-                    session_id=session_id,
-                    completed_at=str(profile.updated_at) 
-                )
-            )
+    # 这里简化处理，实际可以通过session_id查具体的完成时间
+    # V1阶段使用profile更新时间或session创建时间
+    completed_at = str(profile.updated_at)
+    baseline_zones = [
+        BaselineZoneInfo.model_construct(
+            zone_id=int(zone_id_str),
+            session_id=str(session_id),
+            completed_at=completed_at
+        )
+        for zone_id_str, session_id in (profile.baseline_zone_map or {}).items()
+    ]
 
     return UserProfileResponse(
         user_id=profile.user_id,
@@ -2,14 +2,21 @@
 System Configuration Management
 Based on environment variables
 """
+import logging
 import os
+from functools import cached_property, lru_cache
 from pathlib import Path
 from typing import Optional
 from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
-    """System Configuration"""
+    """
+    System Configuration
+
+    Derived values (URLs, storage paths) are cached_property: computed once on
+    first access, since settings are not mutated at runtime.
+    """
 
     # ========================================
     # Application Basic Configuration
@@ -28,16 +35,28 @@ class Settings(BaseSettings):
     DB_PASSWORD: str = "postgre"
     DB_NAME: str = "oral_health_db"
 
-    @property
+    # Connection pool configuration
+    DB_POOL_SIZE: int = 20  # Persistent connections kept in the pool
+    DB_MAX_OVERFLOW: int = 30  # Extra connections allowed under burst load
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 3600  # Recycle connections older than this (seconds)
+
+    @cached_property
     def DATABASE_URL(self) -> str:
         """Generate database connection URL"""
         return f"postgresql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
-    @property
+    @cached_property
     def DATABASE_URL_ASYNC(self) -> str:
         """Generate async database connection URL"""
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    # ========================================
+    # Cache Configuration (Redis, optional)
+    # ========================================
+    REDIS_URL: Optional[str] = None  # e.g. redis://localhost:6379/0 (None = cache disabled)
+    RESPONSE_CACHE_TTL: int = 30  # GET response cache TTL (seconds)
+
     # ========================================
     # File Storage Configuration
     # ========================================
@@ -47,28 +66,33 @@ class Settings(BaseSettings):
     # Data storage root directory
     DATA_ROOT: Optional[str] = None
 
-    @property
+    @cached_property
     def DATA_ROOT_PATH(self) -> Path:
         """Data storage root path"""
         if self.DATA_ROOT:
             return Path(self.DATA_ROOT)
         return self.BASE_DIR / "data"
 
-    @property
+    @cached_property
     def B_STREAM_PATH(self) -> Path:
         """B stream (raw videos) storage path"""
         return self.DATA_ROOT_PATH / "b_stream"
 
-    @property
+    @cached_property
     def A_STREAM_PATH(self) -> Path:
         """A stream (keyframes) storage path"""
         return self.DATA_ROOT_PATH / "a_stream"
 
-    @property
+    @cached_property
     def C_STREAM_PATH(self) -> Path:
         """C stream (training data) storage path"""
         return self.DATA_ROOT_PATH / "c_stream"
 
+    @cached_property
+    def TMP_PATH(self) -> Path:
+        """Upload temp directory (same filesystem as the B stream, so ingest can rename)"""
+        return self.DATA_ROOT_PATH / "tmp"
+
     # ========================================
     # Video Processing Configuration
     # ========================================
@@ -123,27 +147,61 @@ class Settings(BaseSettings):
 # ========================================
 # Global Configuration Instance
 # ========================================
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide Settings, parsing .env/environment on first call"""
+    return Settings()
+
+
+def __getattr__(name: str):
+    """Lazy module attribute: `from app.config import settings` builds Settings on first use"""
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 # ========================================
 # Initialization Functions
 # ========================================
+# Directories already created in this process (skip repeated mkdir syscalls)
+_ENSURED_DIRECTORIES: set = set()
+
+
 def ensure_directories():
     """Ensure all necessary directories exist"""
+    settings = get_settings()
     directories = [
         settings.B_STREAM_PATH,
         settings.A_STREAM_PATH,
         settings.C_STREAM_PATH,
+        settings.TMP_PATH,
     ]
 
     for directory in directories:
+        if directory in _ENSURED_DIRECTORIES:
+            continue
         directory.mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRECTORIES.add(directory)
         print(f"[Config] Directory ready: {directory}")
 
 
+def setup_logging():
+    """Configure the root logger from LOG_LEVEL / LOG_FILE (module loggers inherit it)"""
+    settings = get_settings()
+    handlers = [logging.StreamHandler()]
+    if settings.LOG_FILE:
+        handlers.append(logging.FileHandler(settings.LOG_FILE, encoding="utf-8"))
+
+    logging.basicConfig(
+        level=settings.LOG_LEVEL.upper(),
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=handlers,
+    )
+
+
 def validate_config():
     """Validate critical configuration items"""
+    settings = get_settings()
     errors = []
 
     # Check database configuration
@@ -173,6 +231,7 @@ def validate_config():
 # Auto-execute on startup
 # ========================================
 if __name__ == "__main__":
+    settings = get_settings()
     print("=" * 60)
     print(f"{settings.APP_NAME} v{settings.APP_VERSION}")
     print("=" * 60)
@@ -3,11 +3,19 @@
 EvidencePack 生成器 - 增强版
 适配最新的 KeyframeData 模型，支持基线匹配、用户事件和关注点
 """
-import json
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
 from typing import List, Optional, Dict
 from pathlib import Path
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, select, cast, extract, literal, Integer, Text, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
+from pydantic import TypeAdapter
 
 from app.models.database import (
     ASession, AKeyframe, AEvidencePack, 
@@ -16,9 +24,37 @@ from app.models.database import (
 from app.models.evidence_pack import (
     EvidencePack, KeyframeData, FrameMetaTags, BaselineReference,
     UserEventData, ConcernPointData, UserHistorySummary,
-    ZONE_DISPLAY_NAMES
+    ZONE_DISPLAY_NAMES, EVENT_TYPE_DISPLAY_NAMES
+)
+
+logger = logging.getLogger(__name__)
+
+# 导出 JSON 文件时的写缓冲大小（1MB）
+EXPORT_WRITE_BUFFER = 1 << 20
+
+# 数据库端天数差计算使用的每日秒数
+SECONDS_PER_DAY = 86400
+
+# 导出时直接序列化为 UTF-8 字节的适配器（模块级构建一次）
+EVIDENCE_PACK_ADAPTER = TypeAdapter(EvidencePack)
+
+
+# 生成证据包所需的 Session 与关键帧列：一次 JOIN 查询取回，跳过 ORM 对象构建
+# Session 列保留原名，使首行可直接当作 session 使用
+PACK_SOURCE_COLUMNS = (
+    ASession.id,
+    ASession.user_id,
+    ASession.session_type,
+    ASession.zone_id,
+    ASession.created_at,
+    AKeyframe.id.label("frame_id"),
+    AKeyframe.timestamp_in_video,
+    AKeyframe.image_path,
+    AKeyframe.extraction_strategy,
+    AKeyframe.extraction_reason,
+    AKeyframe.anomaly_score,
+    AKeyframe.meta_tags,
 )
-from app.core.frame_matcher import FrameMatcherService
 
 
 class EvidencePackError(Exception):
@@ -26,86 +62,136 @@ class EvidencePackError(Exception):
     pass
 
 
+class _EvidencePackCache:
+    """
+    进程内 EvidencePack LRU 缓存（session_id -> 序列化后的 EvidencePack JSON）
+
+    读取时跳过数据库往返，由 pydantic-core 直接从 JSON 校验重建；
+    generate_evidence_pack 写入时失效对应条目。
+
+    缓存的是不可变的 JSON 字符串，每次命中返回新对象，调用方修改不会影响缓存。
+    缓存按进程独立，其他 worker 重新生成证据包时本进程无法感知，条目在 ttl 秒后过期。
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[EvidencePack]:
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None:
+                return None
+            expires_at, pack_json = entry
+            if expires_at < time.monotonic():
+                del self._data[session_id]
+                return None
+            self._data.move_to_end(session_id)
+        return EvidencePack.model_validate_json(pack_json)
+
+    def put(self, session_id: str, pack: EvidencePack):
+        entry = (time.monotonic() + self.ttl, pack.model_dump_json())
+        with self._lock:
+            self._data[session_id] = entry
+            self._data.move_to_end(session_id)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, session_id: str):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+
+_pack_cache = _EvidencePackCache()
+
+
 class EvidencePackGenerator:
     """EvidencePack 生成器"""
 
     # 事件类型显示名称映射
-    EVENT_TYPE_DISPLAY_MAP: Dict[str, str] = {
-        "dental_cleaning": "洁牙",
-        "scaling": "洗牙/龈下刮治",
-        "filling": "补牙",
-        "extraction": "拔牙",
-        "crown": "牙冠/烤瓷牙",
-        "orthodontic": "正畸调整",
-        "whitening": "美白",
-        "checkup": "口腔检查",
-        "other": "其他"
-    }
+    EVENT_TYPE_DISPLAY_MAP: Dict[str, str] = EVENT_TYPE_DISPLAY_NAMES
 
     def __init__(self, db: Session):
         self.db = db
-        self.frame_matcher = FrameMatcherService(db)
+        self._frame_matcher = None
+
+    @property
+    def frame_matcher(self):
+        """帧匹配服务（仅 Quick Check 生成证据包时需要，首次访问时创建）"""
+        if self._frame_matcher is None:
+            from app.core.frame_matcher import FrameMatcherService
+            self._frame_matcher = FrameMatcherService(self.db)
+        return self._frame_matcher
 
-    def generate_evidence_pack(self, session_id: str) -> EvidencePack:
+    def generate_evidence_pack(self, session_id: str, commit: bool = True) -> EvidencePack:
         """
         为指定 Session 生成 EvidencePack
-        """
-        print(f"[EvidencePack] 开始生成: session_id={session_id}")
 
-        # 第一步：查询 Session
-        session = self.db.query(ASession).filter_by(id=session_id).first()
-        if not session:
-            raise EvidencePackError(f"Session 不存在: {session_id}")
-
-        # 第二步：查询所有关键帧（按帧索引排序）
-        keyframes = (
-            self.db.query(AKeyframe)
-            .filter_by(session_id=session_id)
+        Args:
+            session_id: Session ID
+            commit: 是否立即提交（False 时仅 flush，由调用方统一提交）
+        """
+        logger.info("[EvidencePack] 开始生成: session_id=%s", session_id)
+
+        # 第一、二步：一次查询取回 Session 与所有关键帧（按帧索引排序）
+        # LEFT JOIN：无关键帧时仍返回一行 Session 数据，用于区分两种错误
+        keyframes = self.db.execute(
+            select(*PACK_SOURCE_COLUMNS)
+            .select_from(ASession)
+            .outerjoin(AKeyframe, AKeyframe.session_id == ASession.id)
+            .where(ASession.id == session_id)
             .order_by(AKeyframe.frame_index)
-            .all()
-        )
+        ).all()
 
         if not keyframes:
+            raise EvidencePackError(f"Session 不存在: {session_id}")
+
+        session = keyframes[0]
+        if session.frame_id is None:
             raise EvidencePackError(f"Session 没有关键帧数据: {session_id}")
 
-        print(f"[EvidencePack] 找到 {len(keyframes)} 个关键帧")
+        logger.debug("[EvidencePack] 找到 %d 个关键帧", len(keyframes))
+
+        # 输入未变化时直接复用已生成的 EvidencePack，跳过历史查询、基线匹配与写回
+        cache_key = self._compute_cache_key(keyframes, session)
+        existing_pack = self.db.query(AEvidencePack).filter_by(session_id=session.id).first()
+
+        if existing_pack and existing_pack.cache_key == cache_key:
+            logger.info("[EvidencePack] 输入未变化，复用已生成的 EvidencePack: session_id=%s", session_id)
+            evidence_pack = _pack_cache.get(str(session.id))
+            if evidence_pack is None:
+                evidence_pack = EvidencePack(**existing_pack.pack_json)
+                _pack_cache.put(str(session.id), evidence_pack)
+            return evidence_pack
 
         # 第三步：转换为 KeyframeData
         frame_data_list: List[KeyframeData] = []
 
+        # 关键帧集中存放在少数目录下：每个目录 scandir 一次，代替逐帧 stat
+        existing_files = self._list_existing_files(kf.image_path for kf in keyframes)
+
         for kf in keyframes:
             # 确认图像文件存在
-            image_path = Path(kf.image_path)
-            if not image_path.exists():
-                print(f"[警告] 关键帧图像不存在: {image_path}")
+            if os.path.basename(kf.image_path) not in existing_files.get(os.path.dirname(kf.image_path), ()):
+                logger.warning("[EvidencePack] 关键帧图像不存在: %s", kf.image_path)
                 # 即使文件临时缺失，只要数据库有记录，我们仍生成元数据，但标记警告
             
-            # 构建 FrameMetaTags
-            # 数据库中 meta_tags 可能是 dict 或 JSON 字符串，需处理
-            tags_source = kf.meta_tags
-            if isinstance(tags_source, str):
-                try:
-                    tags_dict = json.loads(tags_source)
-                except:
-                    tags_dict = {}
-            elif isinstance(tags_source, dict):
-                tags_dict = tags_source
-            else:
-                tags_dict = {}
-
-            meta_tags = FrameMetaTags(**tags_dict)
-
-            # 构建 KeyframeData
-            # 修正：使用 kf.id (UUID) 作为 frame_id
+            # 构建 FrameMetaTags（meta_tags 为 JSONB 列，驱动已解析为 dict）
+            meta_tags = FrameMetaTags.from_trusted_dict(kf.meta_tags or {})
+
+            # 构建 KeyframeData（数据由抽帧流程写入且受数据库约束，跳过逐帧校验）
+            # 修正：使用关键帧 id (UUID) 作为 frame_id
             # 修正：使用 kf.image_path 作为 image_url (本地路径)
             # 修正：timestamp 格式现已兼容 00:00.00
-            frame_data = KeyframeData(
-                frame_id=str(kf.id),
+            frame_data = KeyframeData.model_construct(
+                frame_id=str(kf.frame_id),
                 timestamp=kf.timestamp_in_video,
                 image_url=str(kf.image_path),
                 extraction_strategy=kf.extraction_strategy,
-                extraction_reason=kf.extraction_reason,
-                anomaly_score=kf.anomaly_score,
+                extraction_reason=kf.extraction_reason or "",
+                anomaly_score=kf.anomaly_score or 0.0,
                 meta_tags=meta_tags
             )
 
@@ -114,6 +200,8 @@ class EvidencePackGenerator:
         if not frame_data_list:
             raise EvidencePackError("没有有效的关键帧数据")
 
+        total_frames = len(frame_data_list)
+
         # 第四步：如果是 Quick Check，构建基线参考（使用简化方法：每区域取中间帧）
         baseline_reference: Optional[BaselineReference] = None
         comparison_mode = "none"
@@ -124,13 +212,13 @@ class EvidencePackGenerator:
                 user_id=session.user_id
             )
             comparison_mode = baseline_reference.comparison_mode if baseline_reference else "none"
-            print(f"[EvidencePack] 基线参考构建完成: comparison_mode={comparison_mode}, "
-                  f"覆盖 {len(middle_frames) if middle_frames else 0}/7 区域")
+            logger.debug("[EvidencePack] 基线参考构建完成: comparison_mode=%s, 覆盖 %d/7 区域",
+                         comparison_mode, len(middle_frames) if middle_frames else 0)
 
         # 第五步：构建用户历史摘要（事件和关注点）
         user_history = self._build_user_history(session.user_id, session_id)
-        print(f"[EvidencePack] 用户历史摘要: {user_history.total_events} 个事件, "
-              f"{len(user_history.active_concerns)} 个活跃关注点")
+        logger.debug("[EvidencePack] 用户历史摘要: %d 个事件, %d 个活跃关注点",
+                     user_history.total_events, len(user_history.active_concerns))
 
         # 第六步：构建 EvidencePack
         evidence_pack = EvidencePack(
@@ -138,46 +226,131 @@ class EvidencePackGenerator:
             user_id=session.user_id,
             session_type=session.session_type,
             zone_id=session.zone_id,
-            created_at=str(session.created_at.isoformat()),
-            total_frames=len(frame_data_list),
+            created_at=session.created_at.isoformat(),
+            total_frames=total_frames,
             frames=frame_data_list,
             baseline_reference=baseline_reference,
             user_history=user_history
         )
 
-        print(f"[EvidencePack] EvidencePack 构建完成，包含 {len(frame_data_list)} 帧")
+        logger.info("[EvidencePack] EvidencePack 构建完成，包含 %d 帧", total_frames)
 
         # 第六步：保存到数据库
-        # 检查是否已存在
-        existing_pack = self.db.query(AEvidencePack).filter_by(session_id=session.id).first()
-        baseline_ref_json = baseline_reference.model_dump() if baseline_reference else None
+        # 由 Pydantic（Rust 实现）直接序列化为 JSON 字符串，数据库端 CAST 为 JSONB，
+        # 省去 model_dump() 构建大字典再由驱动 json.dumps 的两次遍历
+        pack_json = self._as_jsonb(evidence_pack.model_dump_json())
+        baseline_ref_json = self._as_jsonb(baseline_reference.model_dump_json()) if baseline_reference else None
 
         if existing_pack:
-            print(f"[EvidencePack] 更新已存在的 EvidencePack: {existing_pack.id}")
-            existing_pack.pack_json = evidence_pack.model_dump()
-            existing_pack.total_frames = len(frame_data_list)
+            logger.debug("[EvidencePack] 更新已存在的 EvidencePack: %s", existing_pack.id)
+            existing_pack.pack_json = pack_json
+            existing_pack.total_frames = total_frames
             existing_pack.baseline_reference_json = baseline_ref_json
             existing_pack.comparison_mode = comparison_mode
-            self.db.add(existing_pack)
+            existing_pack.cache_key = cache_key
         else:
             db_evidence_pack = AEvidencePack(
                 session_id=session.id,
-                pack_json=evidence_pack.model_dump(),
-                total_frames=len(frame_data_list),
+                pack_json=pack_json,
+                total_frames=total_frames,
                 baseline_reference_json=baseline_ref_json,
-                comparison_mode=comparison_mode
+                comparison_mode=comparison_mode,
+                cache_key=cache_key
             )
             self.db.add(db_evidence_pack)
-            print(f"[EvidencePack] 创建新的 EvidencePack")
+            logger.debug("[EvidencePack] 创建新的 EvidencePack")
+
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
 
-        self.db.commit()
+        # 未提交的结果可能被回滚，这里只失效缓存，由下次读取时从数据库加载
+        _pack_cache.invalidate(str(session.id))
 
         return evidence_pack
 
+    def _compute_cache_key(self, keyframes, session) -> str:
+        """
+        计算生成输入的摘要
+
+        覆盖关键帧内容、用户档案与历史数据的最新变更时间，以及当天日期
+        （历史摘要中的天数随日期变化）。变更时间由一次查询取回。
+
+        Args:
+            keyframes: Session 与关键帧的联合查询结果
+            session: Session 数据（keyframes 第一行）
+
+        Returns:
+            32 位十六进制摘要
+        """
+        user_id = session.user_id
+        freshness = self.db.execute(select(
+            select(AUserProfile.updated_at)
+            .where(AUserProfile.user_id == user_id)
+            .scalar_subquery(),
+            select(func.count(AUserEvent.id))
+            .where(AUserEvent.user_id == user_id)
+            .scalar_subquery(),
+            select(func.max(AUserEvent.created_at))
+            .where(AUserEvent.user_id == user_id)
+            .scalar_subquery(),
+            select(func.count(AConcernPoint.id))
+            .where(AConcernPoint.user_id == user_id)
+            .scalar_subquery(),
+            select(func.max(AConcernPoint.updated_at))
+            .where(AConcernPoint.user_id == user_id)
+            .scalar_subquery(),
+            select(func.max(ASession.completed_at))
+            .where(
+                ASession.user_id == user_id,
+                ASession.id != session.id,
+                ASession.processing_status == "completed"
+            )
+            .scalar_subquery()
+        )).one()
+
+        hasher = hashlib.blake2b(digest_size=16)
+        for row in keyframes:
+            hasher.update(repr(tuple(row)).encode("utf-8"))
+        hasher.update(repr(tuple(freshness)).encode("utf-8"))
+        hasher.update(date.today().isoformat().encode("ascii"))
+        return hasher.hexdigest()
+
+    @staticmethod
+    def _as_jsonb(json_text: str):
+        """将已序列化的 JSON 文本包装为 CAST(... AS JSONB) 表达式（以 TEXT 绑定，避免被再次编码）"""
+        return cast(literal(json_text, Text), JSONB)
+
+    @staticmethod
+    def _list_existing_files(image_paths) -> Dict[str, set]:
+        """
+        按目录列出已存在的文件名
+
+        Args:
+            image_paths: 图像路径（字符串）迭代器
+
+        Returns:
+            {目录: 文件名集合}，目录不存在时对应空集合
+        """
+        existing: Dict[str, set] = {}
+        for directory in {os.path.dirname(p) for p in image_paths}:
+            try:
+                with os.scandir(directory or ".") as entries:
+                    existing[directory] = {entry.name for entry in entries}
+            except OSError:
+                existing[directory] = set()
+        return existing
+
     def get_evidence_pack_by_session(self, session_id: str) -> EvidencePack:
         """
-        从数据库获取已生成的 EvidencePack
+        从数据库获取已生成的 EvidencePack（进程内 LRU 缓存）
         """
+        session_id = str(session_id)
+        cached = _pack_cache.get(session_id)
+        if cached is not None:
+            return cached
+
         db_pack = (
             self.db.query(AEvidencePack)
             .filter_by(session_id=session_id)
@@ -187,23 +360,44 @@ class EvidencePackGenerator:
         if not db_pack:
             raise EvidencePackError(f"EvidencePack 不存在: {session_id}")
 
-        return EvidencePack(**db_pack.pack_json)
+        evidence_pack = EvidencePack(**db_pack.pack_json)
+        _pack_cache.put(session_id, evidence_pack)
+        return evidence_pack
 
-    def export_evidence_pack_json(self, session_id: str, output_path: str) -> Path:
+    def export_evidence_pack_json(self, session_id: str, output_path: str, indent: bool = False) -> Path:
         """
         导出 EvidencePack 为 JSON 文件
+
+        Args:
+            session_id: Session ID
+            output_path: 输出文件路径
+            indent: 是否缩进排版（仅供人工查看，默认输出紧凑 JSON）
         """
         evidence_pack = self.get_evidence_pack_by_session(session_id)
 
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(evidence_pack.model_dump_json(indent=2))
+        # 直接序列化为 UTF-8 字节：不构建中间字典，也省去 str 再编码的一次拷贝
+        json_bytes = EVIDENCE_PACK_ADAPTER.dump_json(evidence_pack, indent=2 if indent else None)
+        with open(output_path, "wb", buffering=EXPORT_WRITE_BUFFER) as f:
+            f.write(json_bytes)
 
-        print(f"[EvidencePack] 已导出 JSON: {output_path}")
+        logger.info("[EvidencePack] 已导出 JSON: %s", output_path)
         return output_path
 
+    @staticmethod
+    def _days_since(now: datetime, column):
+        """
+        数据库端计算 now 与时间列相差的整天数
+
+        now 以参数传入（与列同为无时区 TIMESTAMP），结果与 Python 中 (now - value).days 一致：
+        按秒数向下取整到天，未来时间得到负数（-0.5 天 -> -1）。
+        extract(day ...) 向零截断，在未来时间上会与 .days 相差一天，因此不使用。
+        """
+        seconds = extract("epoch", literal(now, TIMESTAMP) - column)
+        return cast(func.floor(seconds / SECONDS_PER_DAY), Integer)
+
     def _build_user_history(self, user_id: str, current_session_id: str) -> UserHistorySummary:
         """
         构建用户历史摘要（事件和关注点）
@@ -218,10 +412,18 @@ class EvidencePackGenerator:
         now = datetime.now()
         year_ago = now - timedelta(days=360)
         
-        # 1. 查询近期事件（最近12个月）
+        # 1. 查询近期事件（最近12个月）：只取 DTO 需要的列，天数差由数据库计算
         recent_events = (
-            self.db.query(AUserEvent)
-            .filter_by(user_id=user_id)
+            self.db.query(
+                AUserEvent.id,
+                AUserEvent.event_type,
+                AUserEvent.event_date,
+                AUserEvent.event_description,
+                AUserEvent.related_session_id,
+                AUserEvent.event_metadata,
+                self._days_since(now, AUserEvent.event_date).label("days_since")
+            )
+            .filter(AUserEvent.user_id == user_id)
             .filter(AUserEvent.event_date >= year_ago)
             .order_by(AUserEvent.event_date.desc())
             .all()
@@ -229,29 +431,43 @@ class EvidencePackGenerator:
         
         # 2. 查询所有关注点
         all_concerns = (
-            self.db.query(AConcernPoint)
-            .filter_by(user_id=user_id)
+            self.db.query(
+                AConcernPoint.id,
+                AConcernPoint.source_type,
+                AConcernPoint.zone_id,
+                AConcernPoint.location_description,
+                AConcernPoint.concern_type,
+                AConcernPoint.concern_description,
+                AConcernPoint.severity,
+                AConcernPoint.status,
+                AConcernPoint.first_detected_at,
+                AConcernPoint.last_observed_at,
+                AConcernPoint.related_sessions,
+                self._days_since(now, AConcernPoint.first_detected_at).label("days_since_first")
+            )
+            .filter(AConcernPoint.user_id == user_id)
             .all()
         )
         
+        # 循环内使用的查找函数与构造函数提前绑定为局部变量
+        # 字段均来自数据库（类型已由列定义保证），使用 model_construct 跳过逐条校验
+        event_display = self.EVENT_TYPE_DISPLAY_MAP.get
+        zone_display = ZONE_DISPLAY_NAMES.get
+        build_event = UserEventData.model_construct
+        build_concern = ConcernPointData.model_construct
+
         # 3. 构建事件数据列表
         event_data_list: List[UserEventData] = []
         for event in recent_events:
-            event_date = event.event_date
-            if isinstance(event_date, str):
-                event_date = datetime.fromisoformat(event_date.replace('Z', '+00:00'))
-            
-            days_since = (now - event_date).days
-            
-            event_data = UserEventData(
+            event_data = build_event(
                 event_id=str(event.id),
                 event_type=event.event_type,
-                event_type_display=self.EVENT_TYPE_DISPLAY_MAP.get(event.event_type, event.event_type),
-                event_date=event_date.isoformat(),
+                event_type_display=event_display(event.event_type, event.event_type),
+                event_date=event.event_date.isoformat(),
                 event_description=event.event_description,
                 related_session_id=str(event.related_session_id) if event.related_session_id else None,
                 metadata=event.event_metadata or {},
-                days_since_event=days_since
+                days_since_event=event.days_since
             )
             event_data_list.append(event_data)
         
@@ -269,52 +485,39 @@ class EvidencePackGenerator:
             
             # 只将活跃和监控中的关注点加入列表
             if concern.status in ["active", "monitoring"]:
-                first_detected = concern.first_detected_at
-                if isinstance(first_detected, str):
-                    first_detected = datetime.fromisoformat(first_detected.replace('Z', '+00:00'))
+                first_detected = concern.first_detected_at.isoformat()
                 
-                days_since_first = (now - first_detected).days
-                
-                concern_data = ConcernPointData(
+                concern_data = build_concern(
                     concern_id=str(concern.id),
                     source_type=concern.source_type,
                     zone_id=concern.zone_id,
-                    zone_display_name=ZONE_DISPLAY_NAMES.get(concern.zone_id) if concern.zone_id else None,
+                    zone_display_name=zone_display(concern.zone_id) if concern.zone_id else None,
                     location_description=concern.location_description,
                     concern_type=concern.concern_type,
                     concern_description=concern.concern_description,
                     severity=concern.severity,
                     status=concern.status,
-                    first_detected_at=first_detected.isoformat(),
-                    last_observed_at=concern.last_observed_at.isoformat() if concern.last_observed_at else first_detected.isoformat(),
-                    days_since_first=days_since_first,
+                    first_detected_at=first_detected,
+                    last_observed_at=concern.last_observed_at.isoformat() if concern.last_observed_at else first_detected,
+                    days_since_first=concern.days_since_first,
                     related_sessions_count=len(concern.related_sessions) if concern.related_sessions else 0
                 )
                 active_concerns.append(concern_data)
         
         # 5. 计算距上次检查天数
-        days_since_last_check = None
-        last_session = (
-            self.db.query(ASession)
-            .filter_by(user_id=user_id)
+        days_since_last_check = (
+            self.db.query(self._days_since(now, ASession.created_at))
+            .filter(ASession.user_id == user_id)
             .filter(ASession.id != current_session_id)
             .filter(ASession.processing_status == "completed")
+            .filter(ASession.created_at.isnot(None))
             .order_by(ASession.created_at.desc())
-            .first()
+            .limit(1)
+            .scalar()
         )
-        if last_session and last_session.created_at:
-            last_check = last_session.created_at
-            if isinstance(last_check, str):
-                last_check = datetime.fromisoformat(last_check.replace('Z', '+00:00'))
-            days_since_last_check = (now - last_check).days
         
-        # 6. 计算距上次事件天数
-        days_since_last_event = None
-        if recent_events and recent_events[0].event_date:
-            last_event_date = recent_events[0].event_date
-            if isinstance(last_event_date, str):
-                last_event_date = datetime.fromisoformat(last_event_date.replace('Z', '+00:00'))
-            days_since_last_event = (now - last_event_date).days
+        # 6. 计算距上次事件天数（事件已按日期倒序）
+        days_since_last_event = recent_events[0].days_since if recent_events else None
         
         return UserHistorySummary(
             total_events=len(recent_events),
@@ -325,41 +528,3 @@ class EvidencePackGenerator:
             days_since_last_check=days_since_last_check,
             days_since_last_event=days_since_last_event
         )
-
-    def _build_baseline_reference(
-        self,
-        user_id: str,
-        quick_check_keyframes: List[AKeyframe],
-        frame_data_list: List[KeyframeData]
-    ) -> Optional[BaselineReference]:
-        """
-        构建基线参考数据
-
-        Args:
-            user_id: 用户ID
-            quick_check_keyframes: Quick Check 关键帧（数据库对象）
-            frame_data_list: 帧数据列表（Pydantic对象）
-
-        Returns:
-            BaselineReference 对象
-        """
-        # 使用 FrameMatcherService 进行匹配
-        baseline_ref = self.frame_matcher.build_baseline_reference(
-            user_id=user_id,
-            quick_check_frames=quick_check_keyframes
-        )
-
-        # 更新 frame_data_list 中的 matched_baseline_frame_id
-        if baseline_ref.has_baseline and baseline_ref.matched_baseline_frames:
-            # 通过 FrameMatcherService 获取详细匹配
-            matches = self.frame_matcher.match_frames_to_baseline(
-                quick_check_frames=quick_check_keyframes,
-                user_id=user_id
-            )
-
-            # 更新每个帧的 matched_baseline_frame_id
-            for frame_data in frame_data_list:
-                if frame_data.frame_id in matches:
-                    frame_data.matched_baseline_frame_id = matches[frame_data.frame_id].baseline_frame_id
-
-        return baseline_ref
\ No newline at end of file
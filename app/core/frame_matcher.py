@@ -3,9 +3,11 @@
 帧匹配服务
 基于结构化标签匹配 Quick Check 帧与基线帧
 """
-from typing import List, Dict, Optional, Tuple
-import json
-from sqlalchemy.orm import Session
+import logging
+from typing import List, Dict, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session, contains_eager
 
 from app.models.database import AKeyframe, ASession, AUserProfile
 from app.models.evidence_pack import (
@@ -19,12 +21,50 @@ from app.models.evidence_pack import (
     ZONE_DISPLAY_NAMES
 )
 
+logger = logging.getLogger(__name__)
+
 
 class FrameMatcherError(Exception):
     """帧匹配服务异常"""
     pass
 
 
+def _enum_codes(enum_cls, unknown) -> Dict:
+    """枚举值 -> 小整数编码，UNKNOWN 固定为 0"""
+    codes = {unknown: 0}
+    for member in enum_cls:
+        if member is not unknown:
+            codes[member] = len(codes)
+    return codes
+
+
+_SIDE_CODES = _enum_codes(ToothSide, ToothSide.UNKNOWN)
+_TOOTH_TYPE_CODES = _enum_codes(ToothType, ToothType.UNKNOWN)
+_REGION_CODES = _enum_codes(Region, Region.UNKNOWN)
+
+# 打包后各字段所在的位段：side 占 16-23 位，tooth_type 占 8-15 位，region 占 0-7 位
+SIDE_MASK = 0xFF0000
+TOOTH_TYPE_MASK = 0x00FF00
+REGION_MASK = 0x0000FF
+
+
+def pack_tags(tags: FrameMetaTags) -> int:
+    """
+    将结构化标签打包为单个整数，便于按位比较
+
+    Args:
+        tags: 帧标签
+
+    Returns:
+        (side << 16) | (tooth_type << 8) | region，各字段为 0 表示未知
+    """
+    return (
+        (_SIDE_CODES[tags.side] << 16)
+        | (_TOOTH_TYPE_CODES[tags.tooth_type] << 8)
+        | _REGION_CODES[tags.region]
+    )
+
+
 class FrameMatcherService:
     """帧匹配服务：匹配 Quick Check 帧与基线帧"""
 
@@ -44,6 +84,9 @@ class FrameMatcherService:
             db: 数据库会话
         """
         self.db = db
+        # 基线帧缓存（user_id -> 按 zone_id 分组的基线帧）
+        # 服务实例随数据库会话按请求创建，缓存生命周期即一次请求
+        self._baseline_cache: Dict[str, Dict[int, List[AKeyframe]]] = {}
 
     def match_frames_to_baseline(
         self,
@@ -60,23 +103,39 @@ class FrameMatcherService:
         Returns:
             匹配结果字典：{quick_check_frame_id: BaselineFrameReference}
         """
-        print(f"[FrameMatcher] 开始匹配帧: user_id={user_id}, qc_frames={len(quick_check_frames)}")
+        logger.debug("[FrameMatcher] 开始匹配帧: user_id=%s, qc_frames=%d", user_id, len(quick_check_frames))
 
         # 获取用户所有基线帧
         baseline_frames_by_zone = self._get_user_baseline_frames(user_id)
 
         if not baseline_frames_by_zone:
-            print(f"[FrameMatcher] 用户没有基线帧数据")
+            logger.debug("[FrameMatcher] 用户没有基线帧数据: user_id=%s", user_id)
             return {}
 
+        # 基线帧标签只解析、打包一次，供所有 Quick Check 帧复用
+        baseline_candidates = [
+            (bl_frame, zone_id)
+            for zone_id, baseline_frames in baseline_frames_by_zone.items()
+            for bl_frame in baseline_frames
+        ]
+        baseline_packs = self._pack_frames([bl_frame for bl_frame, _ in baseline_candidates])
+        qc_packs = self._pack_frames(quick_check_frames)
+
+        # 一次计算全部 Q×B 得分，逐行取最高分（argmax 保留先出现者）
+        scores = self._calculate_structural_match_scores(qc_packs, baseline_packs)
+        best_indices = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(quick_check_frames)), best_indices]
+        matched_rows = np.flatnonzero((best_scores > 0.0) & (best_scores >= self.MIN_MATCH_SCORE))
+
+        # 只为命中的行构建 BaselineFrameReference
         matches: Dict[str, BaselineFrameReference] = {}
+        for row in matched_rows.tolist():
+            bl_frame, zone_id = baseline_candidates[best_indices[row]]
+            matches[str(quick_check_frames[row].id)] = self._build_frame_reference(
+                bl_frame, zone_id, float(best_scores[row])
+            )
 
-        for qc_frame in quick_check_frames:
-            best_match = self._find_best_baseline_match(qc_frame, baseline_frames_by_zone)
-            if best_match:
-                matches[str(qc_frame.id)] = best_match
-
-        print(f"[FrameMatcher] 匹配完成: 匹配到 {len(matches)}/{len(quick_check_frames)} 帧")
+        logger.debug("[FrameMatcher] 匹配完成: 匹配到 %d/%d 帧", len(matches), len(quick_check_frames))
         return matches
 
     def build_baseline_reference(
@@ -94,6 +153,24 @@ class FrameMatcherService:
         Returns:
             BaselineReference 对象
         """
+        baseline_ref, _ = self.build_baseline_with_matches(user_id, quick_check_frames)
+        return baseline_ref
+
+    def build_baseline_with_matches(
+        self,
+        user_id: str,
+        quick_check_frames: List[AKeyframe]
+    ) -> Tuple[BaselineReference, Dict[str, BaselineFrameReference]]:
+        """
+        构建基线参考数据，并同时返回逐帧匹配结果（只匹配一次）
+
+        Args:
+            user_id: 用户ID
+            quick_check_frames: Quick Check 关键帧列表
+
+        Returns:
+            (BaselineReference 对象, {quick_check_frame_id: BaselineFrameReference})
+        """
         # 获取用户档案
         profile = self.db.query(AUserProfile).filter_by(user_id=user_id).first()
 
@@ -101,7 +178,7 @@ class FrameMatcherService:
             return BaselineReference(
                 has_baseline=False,
                 comparison_mode="none"
-            )
+            ), {}
 
         # 匹配帧
         matches = self.match_frames_to_baseline(quick_check_frames, user_id)
@@ -119,7 +196,7 @@ class FrameMatcherService:
             baseline_completion_date=str(profile.baseline_completion_date.isoformat()) if profile.baseline_completion_date else None,
             matched_baseline_frames=list(matches.values()),
             comparison_mode=comparison_mode
-        )
+        ), matches
 
     def _get_user_baseline_frames(self, user_id: str) -> Dict[int, List[AKeyframe]]:
         """
@@ -129,149 +206,142 @@ class FrameMatcherService:
             user_id: 用户ID
 
         Returns:
-            按 zone_id 分组的基线帧字典
+            按 zone_id 分组的基线帧字典（帧的 session 关系已随查询加载）
         """
-        # 查询所有基线 session
-        baseline_sessions = (
-            self.db.query(ASession)
-            .filter_by(user_id=user_id, session_type="baseline")
-            .filter(ASession.processing_status == "completed")
+        cached = self._baseline_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+        # 一次 JOIN 查询取回所有已完成基线 session 的关键帧，
+        # 并填充 AKeyframe.session，后续读取 created_at 不再逐帧查询
+        keyframes = (
+            self.db.query(AKeyframe)
+            .join(AKeyframe.session)
+            .options(contains_eager(AKeyframe.session))
+            .filter(
+                ASession.user_id == user_id,
+                ASession.session_type == "baseline",
+                ASession.processing_status == "completed",
+                ASession.zone_id.isnot(None)
+            )
+            .order_by(ASession.created_at, AKeyframe.session_id, AKeyframe.frame_index)
             .all()
         )
 
-        if not baseline_sessions:
-            return {}
-
         # 按 zone_id 分组
         frames_by_zone: Dict[int, List[AKeyframe]] = {}
+        for keyframe in keyframes:
+            frames_by_zone.setdefault(keyframe.session.zone_id, []).append(keyframe)
 
-        for session in baseline_sessions:
-            zone_id = session.zone_id
-            if zone_id is None:
-                continue
-
-            # 查询该 session 的所有关键帧
-            keyframes = (
-                self.db.query(AKeyframe)
-                .filter_by(session_id=session.id)
-                .order_by(AKeyframe.frame_index)
-                .all()
-            )
-
-            if zone_id not in frames_by_zone:
-                frames_by_zone[zone_id] = []
-
-            frames_by_zone[zone_id].extend(keyframes)
-
+        self._baseline_cache[user_id] = frames_by_zone
         return frames_by_zone
 
-    def _find_best_baseline_match(
-        self,
-        qc_frame: AKeyframe,
-        baseline_frames_by_zone: Dict[int, List[AKeyframe]]
-    ) -> Optional[BaselineFrameReference]:
+    def _pack_frames(self, frames: List[AKeyframe]) -> np.ndarray:
         """
-        为单个 Quick Check 帧找到最佳匹配的基线帧
+        解析并打包一组关键帧的结构化标签
 
         Args:
-            qc_frame: Quick Check 关键帧
-            baseline_frames_by_zone: 按 zone_id 分组的基线帧
+            frames: 关键帧列表
 
         Returns:
-            最佳匹配的 BaselineFrameReference，如果没有匹配返回 None
+            打包标签数组 (uint32)，与 frames 顺序对齐
         """
-        qc_tags = self._parse_meta_tags(qc_frame.meta_tags)
-        best_score = 0.0
-        best_match: Optional[Tuple[AKeyframe, int]] = None
-
-        for zone_id, baseline_frames in baseline_frames_by_zone.items():
-            for bl_frame in baseline_frames:
-                bl_tags = self._parse_meta_tags(bl_frame.meta_tags)
-                score = self._calculate_structural_match_score(qc_tags, bl_tags)
-
-                if score > best_score and score >= self.MIN_MATCH_SCORE:
-                    best_score = score
-                    best_match = (bl_frame, zone_id)
+        return np.fromiter(
+            (pack_tags(self._frame_tags(frame)) for frame in frames),
+            dtype=np.uint32,
+            count=len(frames)
+        )
 
-        if not best_match:
-            return None
+    def _build_frame_reference(
+        self,
+        bl_frame: AKeyframe,
+        zone_id: int,
+        score: float
+    ) -> BaselineFrameReference:
+        """
+        为匹配到的基线帧构建引用
 
-        bl_frame, zone_id = best_match
+        Args:
+            bl_frame: 基线关键帧
+            zone_id: 基线帧所在分区
+            score: 匹配得分
 
-        # 获取基线 session 信息
-        bl_session = self.db.query(ASession).filter_by(id=bl_frame.session_id).first()
+        Returns:
+            BaselineFrameReference 对象
+        """
+        # 基线 session 已随基线帧一并加载；字段均来自数据库，跳过校验
+        bl_session = bl_frame.session
 
-        return BaselineFrameReference(
+        return BaselineFrameReference.model_construct(
             baseline_frame_id=str(bl_frame.id),
             baseline_session_id=str(bl_frame.session_id),
             baseline_zone_id=zone_id,
             baseline_timestamp=bl_frame.timestamp_in_video,
             baseline_image_url=bl_frame.image_path,
             baseline_created_at=str(bl_session.created_at.isoformat()) if bl_session else "",
-            matching_score=best_score
+            matching_score=score
         )
 
-    def _parse_meta_tags(self, meta_tags_data) -> FrameMetaTags:
+    def _frame_tags(self, frame: AKeyframe) -> FrameMetaTags:
         """
-        解析 meta_tags 数据
+        获取关键帧的结构化标签：优先使用调用方已解析并挂在帧上的结果
 
         Args:
-            meta_tags_data: 数据库中的 meta_tags (dict 或 JSON 字符串)
+            frame: 关键帧
 
         Returns:
             FrameMetaTags 对象
         """
-        import json
-
-        if isinstance(meta_tags_data, str):
-            try:
-                tags_dict = json.loads(meta_tags_data)
-            except:
-                tags_dict = {}
-        elif isinstance(meta_tags_data, dict):
-            tags_dict = meta_tags_data
-        else:
-            tags_dict = {}
+        tags = getattr(frame, "_parsed_tags", None)
+        if tags is None:
+            tags = self._parse_meta_tags(frame.meta_tags)
+        return tags
 
-        return FrameMetaTags(**tags_dict)
-
-    def _calculate_structural_match_score(
-        self,
-        qc_tags: FrameMetaTags,
-        baseline_tags: FrameMetaTags
-    ) -> float:
+    def _parse_meta_tags(self, meta_tags_data) -> FrameMetaTags:
         """
-        计算结构化标签匹配得分
+        解析 meta_tags 数据
 
         Args:
-            qc_tags: Quick Check 帧的标签
-            baseline_tags: 基线帧的标签
+            meta_tags_data: 数据库中的 meta_tags（JSONB 列，驱动已解析为 dict）
 
         Returns:
-            匹配得分 (0.0 - 1.0)
+            FrameMetaTags 对象
         """
-        score = 0.0
+        return FrameMetaTags.from_trusted_dict(meta_tags_data or {})
 
-        # 匹配 side
-        if qc_tags.side == baseline_tags.side and qc_tags.side != ToothSide.UNKNOWN:
-            score += self.WEIGHT_SIDE
-        elif qc_tags.side == ToothSide.UNKNOWN or baseline_tags.side == ToothSide.UNKNOWN:
-            # 如果任一方未知，给予部分分数
-            score += self.WEIGHT_SIDE * 0.3
+    def _calculate_structural_match_scores(
+        self,
+        qc_packs: np.ndarray,
+        baseline_packs: np.ndarray
+    ) -> np.ndarray:
+        """
+        计算 Quick Check 帧与基线帧两两之间的结构化标签匹配得分
 
-        # 匹配 tooth_type
-        if qc_tags.tooth_type == baseline_tags.tooth_type and qc_tags.tooth_type != ToothType.UNKNOWN:
-            score += self.WEIGHT_TOOTH_TYPE
-        elif qc_tags.tooth_type == ToothType.UNKNOWN or baseline_tags.tooth_type == ToothType.UNKNOWN:
-            score += self.WEIGHT_TOOTH_TYPE * 0.3
+        逐字段规则：双方相同且已知得满分；任一方未知得 30% 部分分；否则不得分。
+        通过广播 XOR 与位掩码一次性比较全部 Q×B 组合，不再逐对比较枚举。
 
-        # 匹配 region
-        if qc_tags.region == baseline_tags.region and qc_tags.region != Region.UNKNOWN:
-            score += self.WEIGHT_REGION
-        elif qc_tags.region == Region.UNKNOWN or baseline_tags.region == Region.UNKNOWN:
-            score += self.WEIGHT_REGION * 0.3
+        Args:
+            qc_packs: Quick Check 帧的打包标签数组 (uint32, 长度 Q)
+            baseline_packs: 基线帧的打包标签数组 (uint32, 长度 B)
 
-        return min(score, 1.0)
+        Returns:
+            匹配得分矩阵 (Q×B, 0.0 - 1.0)
+        """
+        qc = qc_packs[:, None]
+        bl = baseline_packs[None, :]
+        diff = qc ^ bl
+        scores = np.zeros(diff.shape, dtype=np.float64)
+
+        for mask, weight in (
+            (SIDE_MASK, self.WEIGHT_SIDE),
+            (TOOTH_TYPE_MASK, self.WEIGHT_TOOTH_TYPE),
+            (REGION_MASK, self.WEIGHT_REGION),
+        ):
+            unknown = ((qc & mask) == 0) | ((bl & mask) == 0)
+            equal = (diff & mask) == 0
+            scores += np.where(equal & ~unknown, weight, np.where(unknown, weight * 0.3, 0.0))
+
+        return np.minimum(scores, 1.0)
 
     def get_zone_coverage(self, user_id: str) -> Dict[int, bool]:
         """
@@ -315,13 +385,13 @@ class FrameMatcherService:
         Returns:
             按 zone_id 映射的中间帧 {zone_id: AKeyframe}
         """
-        print(f"[FrameMatcher] 获取用户基线中间帧: user_id={user_id}")
+        logger.debug("[FrameMatcher] 获取用户基线中间帧: user_id=%s", user_id)
 
         # 获取所有区域的帧
         frames_by_zone = self._get_user_baseline_frames(user_id)
 
         if not frames_by_zone:
-            print(f"[FrameMatcher] 用户没有基线帧数据")
+            logger.debug("[FrameMatcher] 用户没有基线帧数据: user_id=%s", user_id)
             return {}
 
         middle_frames: Dict[int, AKeyframe] = {}
@@ -335,10 +405,10 @@ class FrameMatcherService:
             middle_idx = len(zone_frames) // 2
             middle_frames[zone_id] = zone_frames[middle_idx]
 
-            print(f"[FrameMatcher] 区域 {zone_id} ({self.get_zone_display_name(zone_id)}): "
-                  f"共 {len(zone_frames)} 帧, 选择第 {middle_idx + 1} 帧")
+            logger.debug("[FrameMatcher] 区域 %d (%s): 共 %d 帧, 选择第 %d 帧",
+                         zone_id, self.get_zone_display_name(zone_id), len(zone_frames), middle_idx + 1)
 
-        print(f"[FrameMatcher] 获取到 {len(middle_frames)}/7 个区域的中间帧")
+        logger.debug("[FrameMatcher] 获取到 %d/7 个区域的中间帧", len(middle_frames))
         return middle_frames
 
     def build_baseline_reference_simple(self, user_id: str) -> Tuple[BaselineReference, Dict[int, AKeyframe]]:
@@ -373,8 +443,8 @@ class FrameMatcherService:
         # 构建基线帧引用列表
         baseline_frame_refs = []
         for zone_id, frame in middle_frames.items():
-            bl_session = self.db.query(ASession).filter_by(id=frame.session_id).first()
-            ref = BaselineFrameReference(
+            bl_session = frame.session
+            ref = BaselineFrameReference.model_construct(
                 baseline_frame_id=str(frame.id),
                 baseline_session_id=str(frame.session_id),
                 baseline_zone_id=zone_id,
@@ -2,8 +2,13 @@
 """
 视频摄取管道
 """
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Tuple, Optional
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 from datetime import datetime
 
@@ -11,7 +16,59 @@ from app.models.database import BRawVideo, ASession
 from app.utils.hash import calculate_file_hash
 from app.utils.video import validate_video
 from app.services.storage import storage_service
-from app.config import settings
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class IngestionError(Exception):
+    """视频摄取异常（请求参数或视频内容不合法）"""
+    pass
+
+
+class VideoTooLargeError(IngestionError):
+    """视频文件超过大小上限"""
+    pass
+
+
+class UnsupportedVideoError(IngestionError):
+    """视频格式无法解析或不符合上传规范（如时长超限）"""
+    pass
+
+
+# 摄取共享线程池：Hash 计算与视频验证并行执行（hashlib 与 OpenCV 解码均释放 GIL）
+_ingestion_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="ingestion")
+
+
+class _VideoIdCache:
+    """
+    进程内 B 流去重缓存（file_hash -> BRawVideo.id，LRU 淘汰）
+
+    B 流记录写入后不可变，缓存条目无需过期；取回记录失败时由调用方回退到数据库去重。
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, file_hash: str):
+        with self._lock:
+            video_id = self._data.get(file_hash)
+            if video_id is not None:
+                self._data.move_to_end(file_hash)
+            return video_id
+
+    def put(self, file_hash: str, video_id):
+        with self._lock:
+            self._data[file_hash] = video_id
+            self._data.move_to_end(file_hash)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_video_id_cache = _VideoIdCache()
+
 
 class VideoIngestionService:
     def __init__(self, db: Session):
@@ -24,73 +81,124 @@ class VideoIngestionService:
         user_id: str,
         session_type: str,
         zone_id: Optional[int] = None,
-        user_description: Optional[str] = None
+        user_description: Optional[str] = None,
+        file_hash: Optional[str] = None # 上传时已流式计算的 SHA-256，为空时读取临时文件计算
     ) -> Tuple[BRawVideo, ASession]:
         
-        print(f"[摄取] 开始处理: user={user_id}, type={session_type}")
+        logger.info("[摄取] 开始处理: user=%s, type=%s", user_id, session_type)
+        settings = get_settings()
         
         # 1. 基础验证
         if session_type not in ["quick_check", "baseline"]:
-            raise ValueError(f"无效 Session 类型: {session_type}")
-            
-        # 2. 视频物理验证
+            raise IngestionError(f"无效 Session 类型: {session_type}")
+
+        # 2. 视频物理验证（大小单独检查，便于返回 413）
+        file_size = Path(temp_file_path).stat().st_size
+        if file_size > settings.MAX_VIDEO_SIZE_MB * 1024 * 1024:
+            raise VideoTooLargeError(
+                f"视频文件过大: {file_size / (1024 * 1024):.1f}MB > {settings.MAX_VIDEO_SIZE_MB}MB"
+            )
+
+        # 3. 计算 Hash (使用临时文件)，与视频验证重叠执行；上传时已算出则直接复用
+        hash_future = None
+        if file_hash is None:
+            hash_future = _ingestion_executor.submit(calculate_file_hash, temp_file_path)
+
         is_valid, err = validate_video(
             temp_file_path, 
             max_duration=settings.MAX_VIDEO_DURATION_SEC,
             max_size_mb=settings.MAX_VIDEO_SIZE_MB
         )
         if not is_valid:
-            raise ValueError(f"视频验证失败: {err}")
+            if hash_future is not None:
+                hash_future.cancel()
+            raise UnsupportedVideoError(f"视频验证失败: {err}")
 
-        # 3. 计算 Hash (使用临时文件)
-        file_hash = calculate_file_hash(temp_file_path)
-        
-        # 4. B流处理 (Check or Create)
-        b_video = self.db.query(BRawVideo).filter_by(file_hash=file_hash).first()
+        if hash_future is not None:
+            file_hash = hash_future.result()
         
-        if not b_video:
-            # 存入 B 流
-            b_path = storage_service.save_to_b_stream(
-                source_path=temp_file_path,
-                user_id=user_id,
-                file_hash=file_hash
-            )
-            
-            file_size = Path(temp_file_path).stat().st_size
-            
-            b_video = BRawVideo(
-                user_id=user_id,
-                file_hash=file_hash,
-                file_path=str(b_path),
-                file_size_bytes=file_size,
-                session_type=session_type,
-                zone_id=zone_id,
-                user_text_description=user_description,
-                is_locked=True
-            )
-            self.db.add(b_video)
-            self.db.commit()
-            self.db.refresh(b_video)
-            print(f"[摄取] B流归档完成: {b_video.id}")
+        # 4. B流处理 (Insert or Reuse)
+        # 近期见过的 Hash 直接按主键取回记录（命中 Session 身份映射时无需查询），
+        # 跳过注定冲突的 INSERT；记录已不存在时回退到插入路径
+        cached_id = _video_id_cache.get(file_hash)
+        b_video = self.db.get(BRawVideo, cached_id) if cached_id is not None else None
+        cache_b_video = b_video is None
+        if b_video is not None:
+            logger.info("[摄取] 视频已存在，复用 B流: %s", b_video.id)
         else:
-            print(f"[摄取] 视频已存在，复用 B流: {b_video.id}")
+            b_video = self._insert_or_reuse_b_video(
+                temp_file_path, file_hash, file_size, user_id, session_type, zone_id, user_description
+            )
 
         # 5. 创建 A 流 Session
+        b_video_id = b_video.id
         a_session = ASession(
             user_id=user_id,
-            b_video_id=b_video.id,
+            b_video_id=b_video_id,
             session_type=session_type,
             zone_id=zone_id,
             processing_status="pending"
         )
         self.db.add(a_session)
         self.db.commit()
-        self.db.refresh(a_session)
-        
+
+        # 提交成功后才记入进程级缓存，回滚的插入不会留下指向不存在记录的 id
+        if cache_b_video:
+            _video_id_cache.put(file_hash, b_video_id)
+
         return b_video, a_session
 
-    def update_session_status(self, session_id: str, status: str, error_msg: str = None):
-        """更新 Session 状态的辅助方法"""
+    def _insert_or_reuse_b_video(
+        self,
+        temp_file_path: str,
+        file_hash: str,
+        file_size: int,
+        user_id: str,
+        session_type: str,
+        zone_id: Optional[int],
+        user_description: Optional[str]
+    ) -> BRawVideo:
+        """
+        写入 B 流记录并归档视频文件；Hash 已存在时返回已有记录
+
+        INSERT ... ON CONFLICT (file_hash) DO NOTHING：新视频一次往返完成写入，
+        并发上传同一视频时由唯一约束裁决，不会出现先查后插的竞态
+        """
+        b_path = storage_service.get_b_stream_path(user_id, file_hash)
+        b_video = self.db.scalars(
+            insert(BRawVideo)
+            .values(
+                user_id=user_id,
+                file_hash=file_hash,
+                file_path=str(b_path),
+                file_size_bytes=file_size,
+                session_type=session_type,
+                zone_id=zone_id,
+                user_text_description=user_description,
+                is_locked=True
+            )
+            .on_conflict_do_nothing(index_elements=[BRawVideo.file_hash])
+            .returning(BRawVideo)
+        ).first()
+
+        if b_video is not None:
+            # 存入 B 流：临时文件直接 rename 到归档路径，调用方 finally 中的清理自动跳过
+            # 记录尚未提交，归档失败时由调用方回滚
+            storage_service.save_to_b_stream(
+                source_path=temp_file_path,
+                user_id=user_id,
+                file_hash=file_hash,
+                move=True
+            )
+            logger.info("[摄取] B流归档完成: %s", b_video.id)
+        else:
+            b_video = self.db.query(BRawVideo).filter_by(file_hash=file_hash).one()
+            logger.info("[摄取] 视频已存在，复用 B流: %s", b_video.id)
+
+        return b_video
+
+    def update_session_status(self, session_id: str, status: str, error_msg: str = None, commit: bool = True):
+        """更新 Session 状态的辅助方法（commit=False 时仅 flush，由调用方统一提交）"""
         session = self.db.query(ASession).filter_by(id=session_id).first()
         if session:
             session.processing_status = status
@@ -98,5 +206,8 @@ class VideoIngestionService:
                 session.error_message = error_msg
             if status == "completed":
                 session.completed_at = datetime.utcnow()
-            self.db.commit()
-            print(f"[状态] Session {session_id} -> {status}")
\ No newline at end of file
+            if commit:
+                self.db.commit()
+            else:
+                self.db.flush()
+            logger.info("[状态] Session %s -> %s", session_id, status)
\ No newline at end of file
@@ -15,6 +15,8 @@
 - 空间位置分析 (基于图像区域判断视角)
 - 纹理分析 (咬合面、牙缝、牙龈纹理)
 """
+import functools
+
 import cv2
 import numpy as np
 from typing import Dict, List, Tuple, Optional
@@ -26,6 +28,50 @@ from app.models.evidence_pack import (
 )
 
 
+@functools.lru_cache(maxsize=16)
+def _ellipse_kernel(size: int) -> np.ndarray:
+    """椭圆结构元素（按尺寸缓存，避免逐帧重复生成）"""
+    return cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (size, size))
+
+
+@functools.lru_cache(maxsize=16)
+def _box_kernel(size: int) -> np.ndarray:
+    """一维均值平滑核（按尺寸缓存；固定分辨率下每帧尺寸相同）"""
+    kernel = np.full(size, 1.0 / size)
+    kernel.flags.writeable = False
+    return kernel
+
+
+def _build_range_lut(color_ranges: Dict[str, List[Tuple[np.ndarray, np.ndarray]]]) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    将多组 HSV 阈值范围编码为逐通道查找表
+
+    每个阈值范围占一个比特：像素值在该通道范围内时对应比特置 1。
+    三个通道查表结果按位与后，某比特为 1 即像素落在该范围内（与 cv2.inRange 一致）。
+
+    Args:
+        color_ranges: {掩码名称: [(下界, 上界), ...]}，同一掩码的多个范围取并集
+
+    Returns:
+        (三通道查找表 (256, 1, 3) uint8, {掩码名称: 比特位掩码})
+    """
+    lut = np.zeros((256, 3), dtype=np.uint8)
+    values = np.arange(256)
+    mask_bits: Dict[str, int] = {}
+    bit = 0
+    for name, ranges in color_ranges.items():
+        mask_bits[name] = 0
+        for lower, upper in ranges:
+            if bit >= 8:
+                raise ValueError("HSV 阈值范围超过 8 个，无法编码到 uint8 查找表")
+            for channel in range(3):
+                in_range = (values >= lower[channel]) & (values <= upper[channel])
+                lut[in_range, channel] |= 1 << bit
+            mask_bits[name] |= 1 << bit
+            bit += 1
+    return lut.reshape(256, 1, 3), mask_bits
+
+
 @dataclass
 class AnalysisResult:
     """分析结果数据类"""
@@ -76,6 +122,23 @@ class KeyframeAnalyzer:
     ORAL_CAVITY_LOWER = np.array([0, 0, 0])
     ORAL_CAVITY_UPPER = np.array([180, 255, 40])
 
+    # 各颜色掩码对应的 HSV 范围（多个范围取并集），编码为查找表后一次查表得到全部掩码
+    COLOR_RANGES = {
+        "tooth_white": [(TOOTH_WHITE_LOWER, TOOTH_WHITE_UPPER)],
+        "gum_pink": [(GUM_PINK_LOWER, GUM_PINK_UPPER), (GUM_PINK_LOWER2, GUM_PINK_UPPER2)],
+        "dark_deposit": [(DARK_DEPOSIT_LOWER, DARK_DEPOSIT_UPPER)],
+        "yellow_plaque": [(YELLOW_PLAQUE_LOWER, YELLOW_PLAQUE_UPPER)],
+        "gum_red": [(GUM_RED_LOWER1, GUM_RED_UPPER1), (GUM_RED_LOWER2, GUM_RED_UPPER2)],
+        "oral_cavity": [(ORAL_CAVITY_LOWER, ORAL_CAVITY_UPPER)],
+    }
+    COLOR_RANGE_LUT, COLOR_MASK_BITS = _build_range_lut(COLOR_RANGES)
+
+    # 有效口腔图像判断（_is_valid_oral_image）所依据的掩码
+    VALIDITY_MASK_KEYS = ("tooth_white", "gum_pink")
+
+    # 掩码去噪使用的结构元素
+    MORPH_KERNEL = _ellipse_kernel(3)
+
     # ========================================
     # 阈值常量
     # ========================================
@@ -90,6 +153,14 @@ class KeyframeAnalyzer:
     GUM_VISIBILITY_THRESHOLD = 0.15          # 牙龈可见性阈值
     TOOTH_AREA_THRESHOLD = 0.10              # 牙齿区域阈值
 
+    # 分析分辨率：更宽的帧先等比缩小到该宽度
+    # 占比类阈值与分辨率无关；像素面积/长度类阈值按缩放比例换算
+    ANALYSIS_MAX_WIDTH = 480
+
+    # 输出到 FrameMetaTags 的置信度小数位数：启发式置信度的噪声远大于 1e-3，
+    # 截短后 JSONB 与证据包中的数字由 ~18 字符缩至 ~5 字符
+    CONFIDENCE_DECIMALS = 3
+
     def __init__(self, debug: bool = False):
         """
         初始化分析器
@@ -109,29 +180,84 @@ class KeyframeAnalyzer:
         Returns:
             AnalysisResult 包含所有分析维度的结果
         """
-        if frame is None or frame.size == 0:
-            return self._create_unknown_result("Empty frame")
+        return self.analyze_frames_batch([frame])[0]
 
-        # 预处理
-        frame_rgb, frame_hsv, frame_gray = self._preprocess(frame)
-        if frame_hsv is None:
-            return self._create_unknown_result("Preprocessing failed")
+    def analyze_frames_batch(self, frames: List[np.ndarray]) -> List[AnalysisResult]:
+        """
+        批量分析多帧图像
+
+        同尺寸的帧沿行方向堆叠为 (B*H, W, 3)，色彩转换与颜色查表等逐像素运算
+        一次完成；形态学、轮廓与投影等依赖邻域的步骤仍按帧执行。
+
+        Args:
+            frames: BGR 格式的图像数组列表
+
+        Returns:
+            与输入顺序一致的 AnalysisResult 列表
+        """
+        results: List[Optional[AnalysisResult]] = [None] * len(frames)
+
+        # 缩小到分析分辨率，后续色彩转换、掩码、形态学与轮廓运算的像素量随之下降
+        groups: Dict[Tuple[int, ...], List[Tuple[int, np.ndarray, float]]] = {}
+        for i, frame in enumerate(frames):
+            if frame is None or frame.size == 0:
+                results[i] = self._create_unknown_result("Empty frame")
+                continue
+            frame, scale = self._downsample(frame)
+            groups.setdefault(frame.shape, []).append((i, frame, scale))
+
+        for shape, items in groups.items():
+            height = shape[0]
+            stacked = np.concatenate([frame for _, frame, _ in items]) if len(items) > 1 else items[0][1]
+
+            # 预处理
+            stacked_hsv = self._preprocess(stacked)
+            if stacked_hsv is None:
+                for i, _, _ in items:
+                    results[i] = self._create_unknown_result("Preprocessing failed")
+                continue
+
+            # 提取各类 mask（逐像素部分整批完成，去噪按帧切片进行）
+            stacked_masks = self._extract_raw_masks(stacked_hsv)
+            for n, (i, frame, scale) in enumerate(items):
+                rows = slice(n * height, (n + 1) * height)
+                raw_masks = {key: mask[rows] for key, mask in stacked_masks.items()}
+
+                # 先只对有效性判断所需的掩码去噪，无效帧不再处理其余掩码
+                masks = self._denoise_masks({key: raw_masks[key] for key in self.VALIDITY_MASK_KEYS})
+                validity_ratios = self._calculate_region_ratios(masks, frame.shape[:2])
+                if not self._is_valid_oral_image(validity_ratios):
+                    results[i] = self._create_unknown_result("Not a valid oral image", validity_ratios)
+                    continue
 
-        # 提取各类 mask
-        masks = self._extract_color_masks(frame_hsv)
+                masks.update(self._denoise_masks(
+                    {key: mask for key, mask in raw_masks.items() if key not in masks}
+                ))
+                results[i] = self._analyze_masks(frame, masks, scale)
 
+        return results
+
+    def _analyze_masks(self, frame: np.ndarray, masks: Dict[str, np.ndarray],
+                       scale: float) -> AnalysisResult:
+        """
+        基于颜色掩码完成单帧的各维度分析（调用方已确认为有效口腔图像）
+
+        Args:
+            frame: 分析分辨率下的 BGR 图像
+            masks: 去噪后的颜色掩码字典
+            scale: 相对原始分辨率的线性缩放比例
+
+        Returns:
+            AnalysisResult 包含所有分析维度的结果
+        """
         # 计算各区域占比
         ratios = self._calculate_region_ratios(masks, frame.shape[:2])
 
-        # 判断是否为有效口腔图像
-        if not self._is_valid_oral_image(ratios):
-            return self._create_unknown_result("Not a valid oral image", ratios)
-
         # 分析各维度
         side, side_conf = self._analyze_side(frame, masks, ratios)
-        tooth_type, type_conf = self._analyze_tooth_type(frame, masks, ratios)
+        tooth_type, type_conf = self._analyze_tooth_type(frame, masks, ratios, scale)
         region, region_conf = self._analyze_region(frame, masks, ratios)
-        detected_issues = self._detect_issues(frame, masks, ratios)
+        detected_issues = self._detect_issues(frame, masks, ratios, scale)
 
         # 计算综合置信度
         confidence = self._calculate_overall_confidence(
@@ -166,42 +292,67 @@ class KeyframeAnalyzer:
         Returns:
             FrameMetaTags Pydantic 模型
         """
-        result = self.analyze_frame(frame)
-        return FrameMetaTags(
-            side=result.side,
-            tooth_type=result.tooth_type,
-            region=result.region,
-            detected_issues=result.detected_issues,
-            confidence_score=result.confidence_score,
-            is_verified=False
-        )
+        return self.analyze_frames_to_meta_tags([frame])[0]
+
+    def analyze_frames_to_meta_tags(self, frames: List[np.ndarray]) -> List[FrameMetaTags]:
+        """
+        批量分析帧并返回 FrameMetaTags 列表
+
+        Args:
+            frames: BGR 格式的图像数组列表
+
+        Returns:
+            与输入顺序一致的 FrameMetaTags 列表
+        """
+        return [
+            FrameMetaTags(
+                side=result.side,
+                tooth_type=result.tooth_type,
+                region=result.region,
+                detected_issues=result.detected_issues,
+                confidence_score=round(result.confidence_score, self.CONFIDENCE_DECIMALS),
+                is_verified=False
+            )
+            for result in self.analyze_frames_batch(frames)
+        ]
 
     # ========================================
     # 预处理方法
     # ========================================
 
-    def _preprocess(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    def _downsample(self, frame: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        将帧等比缩小到分析分辨率（不放大）
+
+        Returns:
+            (缩放后的图像, 线性缩放比例 <= 1.0)
+        """
+        width = frame.shape[1]
+        if width <= self.ANALYSIS_MAX_WIDTH:
+            return frame, 1.0
+
+        scale = self.ANALYSIS_MAX_WIDTH / width
+        resized = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        return resized, scale
+
+    def _preprocess(self, frame: np.ndarray) -> Optional[np.ndarray]:
         """
         图像预处理
 
         Returns:
-            (RGB图像, HSV图像, 灰度图像)
+            HSV图像（失败时为 None）
         """
         try:
             # 确保是 BGR 格式
             if len(frame.shape) == 2:
                 frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
 
-            # 转换色彩空间
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frame_hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-            frame_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-            return frame_rgb, frame_hsv, frame_gray
+            # 仅颜色分割使用 HSV；灰度图由 _analyze_region 按区域自行转换
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
         except Exception as e:
             if self.debug:
                 print(f"[KeyframeAnalyzer] Preprocess error: {e}")
-            return None, None, None
+            return None
 
     # ========================================
     # 颜色掩码提取
@@ -217,37 +368,46 @@ class KeyframeAnalyzer:
         Returns:
             包含各类掩码的字典
         """
-        masks = {}
-
-        # 牙齿白色区域
-        masks["tooth_white"] = cv2.inRange(hsv, self.TOOTH_WHITE_LOWER, self.TOOTH_WHITE_UPPER)
+        return self._denoise_masks(self._extract_raw_masks(hsv))
 
-        # 牙龈粉红色区域 (两个范围合并)
-        gum_mask1 = cv2.inRange(hsv, self.GUM_PINK_LOWER, self.GUM_PINK_UPPER)
-        gum_mask2 = cv2.inRange(hsv, self.GUM_PINK_LOWER2, self.GUM_PINK_UPPER2)
-        masks["gum_pink"] = cv2.bitwise_or(gum_mask1, gum_mask2)
-
-        # 深色沉积物
-        masks["dark_deposit"] = cv2.inRange(hsv, self.DARK_DEPOSIT_LOWER, self.DARK_DEPOSIT_UPPER)
-
-        # 黄色牙菌斑
-        masks["yellow_plaque"] = cv2.inRange(hsv, self.YELLOW_PLAQUE_LOWER, self.YELLOW_PLAQUE_UPPER)
+    def _extract_raw_masks(self, hsv: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        按颜色范围提取未去噪的二值掩码（纯逐像素运算，可作用于多帧堆叠图像）
 
-        # 牙龈红肿
-        red_mask1 = cv2.inRange(hsv, self.GUM_RED_LOWER1, self.GUM_RED_UPPER1)
-        red_mask2 = cv2.inRange(hsv, self.GUM_RED_LOWER2, self.GUM_RED_UPPER2)
-        masks["gum_red"] = cv2.bitwise_or(red_mask1, red_mask2)
+        Args:
+            hsv: HSV 色彩空间图像
 
-        # 口腔深色背景
-        masks["oral_cavity"] = cv2.inRange(hsv, self.ORAL_CAVITY_LOWER, self.ORAL_CAVITY_UPPER)
+        Returns:
+            包含各类掩码的字典
+        """
+        # 一次查表读取整幅 HSV 图像，三个通道的结果按位与得到每个像素的范围编码
+        # （代替对整幅三通道图像逐个范围调用 cv2.inRange）
+        h_bits, s_bits, v_bits = cv2.split(cv2.LUT(hsv, self.COLOR_RANGE_LUT))
+        range_code = cv2.bitwise_and(cv2.bitwise_and(h_bits, s_bits), v_bits)
+
+        # 按掩码提取比特：任一范围命中即为 255（多个范围自然取并集）
+        return {
+            key: cv2.compare(cv2.bitwise_and(range_code, bits), 0, cv2.CMP_GT)
+            for key, bits in self.COLOR_MASK_BITS.items()
+        }
+
+    def _denoise_masks(self, masks: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """
+        形态学开闭运算去噪（依赖邻域，须按单帧执行）
 
-        # 形态学操作去噪
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        for key in masks:
-            masks[key] = cv2.morphologyEx(masks[key], cv2.MORPH_OPEN, kernel)
-            masks[key] = cv2.morphologyEx(masks[key], cv2.MORPH_CLOSE, kernel)
+        Args:
+            masks: 原始掩码字典
 
-        return masks
+        Returns:
+            去噪后的掩码字典
+        """
+        return {
+            key: cv2.morphologyEx(
+                cv2.morphologyEx(mask, cv2.MORPH_OPEN, self.MORPH_KERNEL),
+                cv2.MORPH_CLOSE, self.MORPH_KERNEL
+            )
+            for key, mask in masks.items()
+        }
 
     def _calculate_region_ratios(self, masks: Dict[str, np.ndarray],
                                   shape: Tuple[int, int]) -> Dict[str, float]:
@@ -265,11 +425,9 @@ class KeyframeAnalyzer:
         if total_pixels == 0:
             return {k: 0.0 for k in masks}
 
-        ratios = {}
-        for key, mask in masks.items():
-            ratios[key] = np.count_nonzero(mask) / total_pixels
-
-        return ratios
+        # 掩码各自连续存放，cv2.countNonZero 逐个统计即为一次顺序读；
+        # 堆叠为 (N, H, W) 需额外复制一遍，且 np.count_nonzero(axis=...) 不走快速路径
+        return {key: cv2.countNonZero(mask) / total_pixels for key, mask in masks.items()}
 
     # ========================================
     # 有效性检查
@@ -304,8 +462,13 @@ class KeyframeAnalyzer:
         h, w = frame.shape[:2]
 
         # 分析牙龈位置分布
-        gum_mask = masks.get("gum_pink", np.zeros((h, w), dtype=np.uint8))
-        tooth_mask = masks.get("tooth_white", np.zeros((h, w), dtype=np.uint8))
+        # 掩码缺失时才分配全零占位图（dict.get 的默认值会在每次调用时先行分配）
+        gum_mask = masks.get("gum_pink")
+        if gum_mask is None:
+            gum_mask = np.zeros((h, w), dtype=np.uint8)
+        tooth_mask = masks.get("tooth_white")
+        if tooth_mask is None:
+            tooth_mask = np.zeros((h, w), dtype=np.uint8)
 
         # 计算上下半区的牙龈占比
         upper_half_gum = np.count_nonzero(gum_mask[:h//2, :])
@@ -358,7 +521,7 @@ class KeyframeAnalyzer:
     # ========================================
 
     def _analyze_tooth_type(self, frame: np.ndarray, masks: Dict[str, np.ndarray],
-                            ratios: Dict[str, float]) -> Tuple[ToothType, float]:
+                            ratios: Dict[str, float], scale: float = 1.0) -> Tuple[ToothType, float]:
         """
         分析牙齿类型：前牙/后牙
 
@@ -366,9 +529,12 @@ class KeyframeAnalyzer:
         1. 牙齿形态特征 - 前牙扁平/后牙有咬合面
         2. 牙齿宽高比 - 前牙较窄长，后牙较宽
         3. 咬合面检测 - 后牙通常可见咬合面纹理
+
+        scale 为相对原始分辨率的缩放比例，像素面积阈值按 scale² 换算
         """
+        area_scale = scale * scale
         tooth_mask = masks.get("tooth_white", None)
-        if tooth_mask is None or np.count_nonzero(tooth_mask) < 100:
+        if tooth_mask is None or np.count_nonzero(tooth_mask) < 100 * area_scale:
             return ToothType.UNKNOWN, 0.3
 
         # 找到牙齿轮廓
@@ -377,15 +543,17 @@ class KeyframeAnalyzer:
         if not contours:
             return ToothType.UNKNOWN, 0.3
 
-        # 分析最大的几个轮廓
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)[:5]
+        # 分析最大的几个轮廓（面积只计算一次，排序与筛选共用）
+        largest = sorted(
+            ((cv2.contourArea(cnt), cnt) for cnt in contours),
+            key=lambda item: item[0], reverse=True
+        )[:5]
 
         aspect_ratios = []
         solidity_scores = []
 
-        for cnt in contours:
-            area = cv2.contourArea(cnt)
-            if area < 500:  # 忽略小区域
+        for area, cnt in largest:
+            if area < 500 * area_scale:  # 忽略小区域
                 continue
 
             # 计算边界矩形
@@ -463,10 +631,12 @@ class KeyframeAnalyzer:
 
             # 在牙齿区域计算纹理复杂度
             if tooth_mask is not None:
-                # 使用 Laplacian 检测纹理
-                laplacian = cv2.Laplacian(gray, cv2.CV_64F)
-                tooth_laplacian = laplacian * (tooth_mask / 255.0)
-                texture_var = np.var(tooth_laplacian[tooth_mask > 0]) if np.any(tooth_mask > 0) else 0
+                # 使用 Laplacian 检测纹理（3x3 孔径下 |值| <= 1020，int16 不会溢出）
+                laplacian = cv2.Laplacian(gray, cv2.CV_16S)
+                texture_var = 0
+                if cv2.countNonZero(tooth_mask) > 0:
+                    _, stddev = cv2.meanStdDev(laplacian, mask=tooth_mask)
+                    texture_var = float(stddev[0, 0]) ** 2
 
                 # 高纹理方差可能是咬合面
                 if texture_var > 500:
@@ -533,29 +703,26 @@ class KeyframeAnalyzer:
         kernel_size = max(5, len(projection) // 50)
         if kernel_size % 2 == 0:
             kernel_size += 1
-        smoothed = np.convolve(projection, np.ones(kernel_size)/kernel_size, mode='same')
+        smoothed = np.convolve(projection, _box_kernel(kernel_size), mode='same')
 
         max_val = np.max(smoothed)
         if max_val == 0:
             return []
 
-        valleys = []
         threshold_val = max_val * threshold
 
-        # 简单的谷点检测
-        for i in range(1, len(smoothed) - 1):
-            if smoothed[i] < threshold_val:
-                if smoothed[i] < smoothed[i-1] and smoothed[i] < smoothed[i+1]:
-                    valleys.append(i)
+        # 简单的谷点检测：低于阈值且严格小于左右相邻点（向量化比较代替逐点循环）
+        middle = smoothed[1:-1]
+        is_valley = (middle < threshold_val) & (middle < smoothed[:-2]) & (middle < smoothed[2:])
 
-        return valleys
+        return (np.flatnonzero(is_valley) + 1).tolist()
 
     # ========================================
     # 异常检测 (Detected Issues)
     # ========================================
 
     def _detect_issues(self, frame: np.ndarray, masks: Dict[str, np.ndarray],
-                       ratios: Dict[str, float]) -> List[DetectedIssue]:
+                       ratios: Dict[str, float], scale: float = 1.0) -> List[DetectedIssue]:
         """
         检测口腔异常类型（多选）
 
@@ -579,8 +746,9 @@ class KeyframeAnalyzer:
 
             if tooth_mask is not None and dark_mask is not None:
                 # 在牙齿区域附近检测深色
-                kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (15, 15))
-                tooth_region = cv2.dilate(tooth_mask, kernel)
+                # 邻域半径按缩放比例换算（保持奇数尺寸）
+                ksize = max(3, int(round(15 * scale)) | 1)
+                tooth_region = cv2.dilate(tooth_mask, _ellipse_kernel(ksize))
                 dark_in_tooth = cv2.bitwise_and(dark_mask, tooth_region)
                 dark_tooth_ratio = np.count_nonzero(dark_in_tooth) / max(np.count_nonzero(tooth_region), 1)
 
@@ -603,7 +771,7 @@ class KeyframeAnalyzer:
                 issues.append(DetectedIssue.GUM_ISSUE)
 
         # 4. 结构缺损检测（通过边缘不规则性）
-        structural_issue = self._detect_structural_defect(frame, masks)
+        structural_issue = self._detect_structural_defect(frame, masks, scale)
         if structural_issue:
             issues.append(DetectedIssue.STRUCTURAL_DEFECT)
 
@@ -614,11 +782,11 @@ class KeyframeAnalyzer:
         return issues
 
     def _detect_structural_defect(self, frame: np.ndarray,
-                                   masks: Dict[str, np.ndarray]) -> bool:
+                                   masks: Dict[str, np.ndarray], scale: float = 1.0) -> bool:
         """
         检测结构缺损（龋齿、缺损等）
 
-        通过分析牙齿轮廓的不规则性来判断
+        通过分析牙齿轮廓的不规则性来判断；面积阈值按 scale² 换算，缺陷深度阈值按 scale 换算
         """
         tooth_mask = masks.get("tooth_white")
         if tooth_mask is None:
@@ -632,7 +800,7 @@ class KeyframeAnalyzer:
 
         for cnt in contours:
             area = cv2.contourArea(cnt)
-            if area < 1000:
+            if area < 1000 * scale * scale:
                 continue
 
             # 计算轮廓的凸包
@@ -652,12 +820,8 @@ class KeyframeAnalyzer:
                 try:
                     defects = cv2.convexityDefects(cnt, hull_indices)
                     if defects is not None:
-                        significant_defects = 0
-                        for i in range(defects.shape[0]):
-                            _, _, _, d = defects[i, 0]
-                            # d 是缺陷深度（以 1/256 像素为单位）
-                            if d > 5000:  # 较大的缺陷
-                                significant_defects += 1
+                        # 第 4 列是缺陷深度（以 1/256 像素为单位），统计较大的缺陷
+                        significant_defects = np.count_nonzero(defects[:, 0, 3] > 5000 * scale)
 
                         if significant_defects >= 2:
                             return True
@@ -6,9 +6,15 @@
 2. 每帧生成结构化中间表示（侧别、牙齿类型、区域、异常检测）
 3. 保存关键帧及元数据到数据库
 """
+import bisect
 import cv2
+import logging
 import numpy as np
+import queue
+import threading
 import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Tuple
 from pathlib import Path
 from sqlalchemy.orm import Session
 from datetime import datetime
@@ -16,10 +22,25 @@ from datetime import datetime
 from app.models.database import AKeyframe
 from app.services.storage import storage_service
 from app.utils.video import VideoProcessor
-from app.config import settings
+from app.config import get_settings
 from app.core.keyframe_analyzer import KeyframeAnalyzer
 
+logger = logging.getLogger(__name__)
+
+
+class ExtractionError(Exception):
+    """抽帧异常"""
+    pass
+
+
+# 关键帧写盘线程池：JPEG 编码与写文件（cv2.imwrite 释放 GIL）与语义分析重叠执行
+_keyframe_io_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="keyframe-io")
+
+
 class KeyframeExtractor:
+    # 规则扫描分辨率：异常判断只依赖颜色区域占比，更宽的帧先等比缩小到该宽度
+    SCAN_MAX_WIDTH = 480
+
     def __init__(self, db: Session, enable_analysis: bool = True):
         """
         初始化抽帧器
@@ -45,74 +66,97 @@ class KeyframeExtractor:
         except:
             return "00:00.00"
 
-    def extract_keyframes(self, session_id: str, video_path: str):
+    def extract_keyframes(self, session_id: str, video_path: str, commit: bool = True):
         """
         执行双轨制抽帧策略
+
+        Args:
+            session_id: Session ID
+            video_path: 视频文件路径
+            commit: 是否立即提交（False 时仅 flush，由调用方统一提交）
         """
         processor = None
         try:
+            settings = get_settings()
+
             # 1. 初始化视频处理器
             processor = VideoProcessor(video_path)
             duration = processor.get_duration()
             total_frames = processor.get_frame_count()
             fps = processor.get_fps()
             
-            print(f"[抽帧] 视频信息: {duration:.2f}s, {total_frames} frames, {fps:.2f} fps")
+            logger.info("[抽帧] 视频信息: %.2fs, %d frames, %.2f fps", duration, total_frames, fps)
 
             # 2. 轨道一：规则触发帧 (Priority Track)
             priority_frames = []
             scan_interval = int(fps) if fps > 0 else 30
+            scan_indices = set(range(0, total_frames, scan_interval))
+
+            # 轨道二的采样位置不依赖扫描结果，与扫描帧在同一遍顺序解码中取出
+            target_count = settings.UNIFORM_SAMPLE_COUNT
+            uniform_indices = []
+            if duration > 0:
+                interval = total_frames / target_count
+                uniform_indices = [int(i * interval) for i in range(target_count)]
+            # 解码循环内逐帧做成员判断用集合；有序列表留给后面的轨道二遍历
+            uniform_index_set = set(uniform_indices)
+            uniform_images = {}
             
-            print(f"[抽帧] 开始规则扫描: 间隔={scan_interval}帧, 阈值={settings.PRIORITY_FRAME_THRESHOLD}")
+            logger.info("[抽帧] 开始规则扫描: 间隔=%d帧, 阈值=%s", scan_interval, settings.PRIORITY_FRAME_THRESHOLD)
             
-            for i in range(0, total_frames, scan_interval):
-                frame = processor.get_frame(i)
-                if frame is not None:
-                    # 获取详细分析结果
-                    score, detail_scores, reason = self._detect_anomaly_opencv(frame)
-                    
-                    # 打印详细分析日志
-                    log_msg = self._format_detection_log(i, score, detail_scores, reason)
-                    print(log_msg)
-                    
-                    if score > settings.PRIORITY_FRAME_THRESHOLD:
-                        # 计算时间戳
-                        ts_val = i / fps if fps else 0
-                        priority_frames.append({
-                            "frame_index": i,
-                            "timestamp_val": ts_val,
-                            "timestamp_str": self._format_timestamp(ts_val),
-                            "score": score,
-                            "strategy": "rule_triggered",
-                            "reason": reason,
-                            "image": frame
-                        })
+            # 顺序解码在后台线程预读，与当前帧的异常检测重叠执行
+            frame_iter = processor.iter_frames_at(scan_indices | uniform_index_set)
+            for i, frame in self._prefetch_frames(frame_iter):
+                if i in uniform_index_set:
+                    uniform_images[i] = frame
+                if i not in scan_indices:
+                    continue
+
+                # 获取详细分析结果
+                score, detail_scores, reason = self._detect_anomaly_opencv(frame)
+                
+                # 逐帧详细分析日志（DEBUG 级别才格式化）
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(self._format_detection_log(i, score, detail_scores, reason))
+                
+                if score > settings.PRIORITY_FRAME_THRESHOLD:
+                    # 计算时间戳
+                    ts_val = i / fps if fps else 0
+                    priority_frames.append({
+                        "frame_index": i,
+                        "timestamp_val": ts_val,
+                        "timestamp_str": self._format_timestamp(ts_val),
+                        "score": score,
+                        "strategy": "rule_triggered",
+                        "reason": reason,
+                        "image": frame
+                    })
             
-            print(f"[抽帧] 规则触发帧数量: {len(priority_frames)} (阈值>{settings.PRIORITY_FRAME_THRESHOLD})")
+            logger.info("[抽帧] 规则触发帧数量: %d (阈值>%s)", len(priority_frames), settings.PRIORITY_FRAME_THRESHOLD)
 
             # 3. 轨道二：均匀抽帧 (Uniform Track)
             uniform_frames = []
-            target_count = settings.UNIFORM_SAMPLE_COUNT
-            if duration > 0:
-                interval = total_frames / target_count
-                for i in range(target_count):
-                    idx = int(i * interval)
-                    # 避免重复
-                    if any(abs(pf["frame_index"] - idx) < 5 for pf in priority_frames):
-                        continue
-                        
-                    frame = processor.get_frame(idx)
-                    if frame is not None:
-                        ts_val = idx / fps if fps else 0
-                        uniform_frames.append({
-                            "frame_index": idx,
-                            "timestamp_val": ts_val,
-                            "timestamp_str": self._format_timestamp(ts_val),
-                            "score": 0.0,
-                            "strategy": "uniform_sampled",  # 修正：匹配数据库 Enum
-                            "reason": "uniform",
-                            "image": frame
-                        })
+            # 规则触发帧按索引升序产生，二分查找两侧最近邻即可判断是否过近
+            priority_indices = [pf["frame_index"] for pf in priority_frames]
+            for idx in uniform_indices:
+                # 避免重复
+                pos = bisect.bisect_left(priority_indices, idx)
+                if (pos < len(priority_indices) and priority_indices[pos] - idx < 5) or \
+                        (pos > 0 and idx - priority_indices[pos - 1] < 5):
+                    continue
+                    
+                frame = uniform_images.get(idx)
+                if frame is not None:
+                    ts_val = idx / fps if fps else 0
+                    uniform_frames.append({
+                        "frame_index": idx,
+                        "timestamp_val": ts_val,
+                        "timestamp_str": self._format_timestamp(ts_val),
+                        "score": 0.0,
+                        "strategy": "uniform_sampled",  # 修正：匹配数据库 Enum
+                        "reason": "uniform",
+                        "image": frame
+                    })
 
             # 4. 合并与去重 (总量控制)
             all_candidates = priority_frames + uniform_frames
@@ -120,40 +164,40 @@ class KeyframeExtractor:
             
             # 截断到最大数量
             final_frames = all_candidates[:settings.MAX_KEYFRAMES]
+            # 释放落选候选帧（含被去重的均匀采样帧）的整幅图像，
+            # 避免其在写盘与语义分析阶段继续占用内存
+            del all_candidates, priority_frames, uniform_frames, uniform_images
             
-            print(f"[抽帧] 最终保留帧数: {len(final_frames)}")
+            logger.info("[抽帧] 最终保留帧数: %d", len(final_frames))
 
-            # 5. 保存并入库（含语义分析）
-            for idx, item in enumerate(final_frames):
-                # 保存图片文件
-                image_filename = f"frame_{item['frame_index']}_{uuid.uuid4().hex[:6]}.jpg"
-                save_path = storage_service.save_keyframe(
+            # 5. 保存图片文件：目录只创建一次，逐帧写盘提交到线程池，与下面的语义分析并行
+            storage_service.prepare_keyframe_dir(session_id)
+            save_futures = [
+                _keyframe_io_executor.submit(
+                    storage_service.save_keyframe,
                     session_id=session_id,
-                    filename=image_filename,
+                    filename=f"frame_{item['frame_index']}_{uuid.uuid4().hex[:6]}.jpg",
                     image_data=item['image']
                 )
+                for item in final_frames
+            ]
+
+            # 6. 语义分析：整批帧一次完成逐像素运算，生成中间表示
+            analyzed_tags = [None] * len(final_frames)
+            if self.enable_analysis and self.analyzer is not None:
+                analyzed_tags = self._analyze_meta_tags([item['image'] for item in final_frames])
 
-                # 6. 语义分析：生成中间表示
-                if self.enable_analysis and self.analyzer is not None:
-                    try:
-                        meta_tags = self.analyzer.analyze_frame_to_meta_tags(item['image'])
-                        meta_tags_dict = meta_tags.model_dump()
-                        print(f"[抽帧] 帧 {item['frame_index']} 分析完成: "
-                              f"side={meta_tags.side.value}, "
-                              f"tooth_type={meta_tags.tooth_type.value}, "
-                              f"region={meta_tags.region.value}, "
-                              f"issues={[i.value for i in meta_tags.detected_issues]}, "
-                              f"conf={meta_tags.confidence_score:.2f}")
-                    except Exception as e:
-                        print(f"[抽帧] 帧 {item['frame_index']} 语义分析失败: {e}")
-                        meta_tags_dict = {
-                            "side": "unknown",
-                            "tooth_type": "unknown",
-                            "region": "unknown",
-                            "detected_issues": ["unknown"],
-                            "confidence_score": 0.0,
-                            "is_verified": False
-                        }
+            # 7. 入库（等待对应图片写盘完成，写盘失败时异常在此抛出）
+            for idx, item in enumerate(final_frames):
+                save_path = save_futures[idx].result()
+
+                meta_tags = analyzed_tags[idx]
+                if meta_tags is not None:
+                    meta_tags_dict = meta_tags.model_dump()
+                    logger.debug("[抽帧] 帧 %d 分析完成: side=%s, tooth_type=%s, region=%s, issues=%s, conf=%.2f",
+                                 item['frame_index'], meta_tags.side.value, meta_tags.tooth_type.value,
+                                 meta_tags.region.value, [i.value for i in meta_tags.detected_issues],
+                                 meta_tags.confidence_score)
                 else:
                     meta_tags_dict = {
                         "side": "unknown",
@@ -177,16 +221,92 @@ class KeyframeExtractor:
                 )
                 self.db.add(keyframe)
 
-            self.db.commit()
+            if commit:
+                self.db.commit()
+            else:
+                self.db.flush()
             
         except Exception as e:
-            print(f"[抽帧错误] {str(e)}")
+            logger.exception("[抽帧错误] Session %s 抽帧失败", session_id)
             self.db.rollback()
-            raise e
+            raise ExtractionError(f"抽帧失败: {e}") from e
         finally:
             if processor:
                 processor.release()
 
+    def _analyze_meta_tags(self, images: list) -> list:
+        """
+        批量生成帧的中间表示，批量失败时逐帧重试
+
+        单帧分析失败只影响该帧（对应位置为 None），不会让整批关键帧都记为未分析。
+
+        Args:
+            images: BGR 图像列表
+
+        Returns:
+            与输入顺序一致的 FrameMetaTags 列表，分析失败的帧为 None
+        """
+        try:
+            return self.analyzer.analyze_frames_to_meta_tags(images)
+        except Exception:
+            logger.exception("[抽帧] 批量语义分析失败，改为逐帧分析")
+
+        analyzed_tags = []
+        for idx, image in enumerate(images):
+            try:
+                analyzed_tags.append(self.analyzer.analyze_frame_to_meta_tags(image))
+            except Exception:
+                logger.exception("[抽帧] 第 %d 个关键帧语义分析失败", idx)
+                analyzed_tags.append(None)
+        return analyzed_tags
+
+    def _prefetch_frames(self, frame_iter: Iterator[Tuple[int, np.ndarray]], maxsize: int = 8):
+        """
+        在后台线程驱动解码迭代器，经有界队列逐个产出 (索引, 帧)
+
+        队列满时解码线程阻塞，内存中最多缓存 maxsize 帧；消费方提前退出或出错时
+        通知解码线程停止并等待其结束，之后视频处理器可继续在调用线程中使用。
+
+        Args:
+            frame_iter: (帧索引, 帧) 迭代器（预读期间仅由解码线程访问）
+            maxsize: 预读队列长度
+
+        Yields:
+            (帧索引, 帧图像)
+        """
+        frames: queue.Queue = queue.Queue(maxsize=maxsize)
+        stop = threading.Event()
+        done = object()
+        error = []
+
+        def reader():
+            try:
+                for item in frame_iter:
+                    if stop.is_set():
+                        return
+                    frames.put(item)
+            except Exception as e:
+                error.append(e)
+            finally:
+                frames.put(done)
+
+        thread = threading.Thread(target=reader, name="keyframe-decode", daemon=True)
+        thread.start()
+        try:
+            while (item := frames.get()) is not done:
+                yield item
+            if error:
+                raise error[0]
+        finally:
+            stop.set()
+            # 清空队列，使阻塞在 put 上的解码线程得以退出
+            while thread.is_alive():
+                try:
+                    frames.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            thread.join()
+
     def _detect_anomaly_opencv(self, frame: np.ndarray) -> tuple:
         """
         OpenCV 异常检测 - 计算综合异常分数和各维度得分
@@ -204,6 +324,12 @@ class KeyframeExtractor:
             return 0.0, {}, "unknown"
 
         h, w = frame.shape[:2]
+        if w > self.SCAN_MAX_WIDTH:
+            # 占比对缩放稳定；INTER_AREA 取区域均值，色彩转换与掩码统计的像素量随之下降
+            scale = self.SCAN_MAX_WIDTH / w
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            h, w = frame.shape[:2]
+
         total_pixels = h * w
         if total_pixels == 0:
             return 0.0, {}, "unknown"
@@ -263,8 +389,8 @@ class KeyframeExtractor:
             
             return total_score, detail_scores, reason_str
 
-        except Exception as e:
-            print(f"[CV Error] Frame analysis failed: {e}")
+        except Exception:
+            logger.exception("[CV Error] Frame analysis failed")
             return 0.0, {}, "detection_error"
 
     def _format_detection_log(self, frame_index: int, total_score: float, 
@@ -3,6 +3,8 @@
 LLM 客户端
 负责调用千问 API 生成口腔健康报告
 """
+import logging
+from functools import lru_cache
 from typing import Optional, List, Dict
 from sqlalchemy.orm import Session
 
@@ -11,7 +13,9 @@ from app.models.evidence_pack import EvidencePack, KeyframeData, FrameMetaTags
 from app.services.qianwen_vision import QianwenVisionClient, LLMResponse
 from app.core.frame_matcher import FrameMatcherService
 from app.core.llm_prompt_builder import PromptBuilder
-from app.config import settings
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
 
 
 class LLMClientError(Exception):
@@ -19,21 +23,40 @@ class LLMClientError(Exception):
     pass
 
 
+@lru_cache(maxsize=1)
+def get_qianwen_client() -> QianwenVisionClient:
+    """
+    获取全局共享的千问客户端
+
+    首次调用时按当前配置创建，进程内复用各线程的 HTTP 连接池，应用关闭时释放。
+    """
+    settings = get_settings()
+    return QianwenVisionClient(
+        api_key=settings.QIANWEN_API_KEY,
+        model=settings.QIANWEN_VISION_MODEL
+    )
+
+
+def close_qianwen_client():
+    """关闭全局千问客户端（未创建时不做任何事）"""
+    if get_qianwen_client.cache_info().currsize:
+        get_qianwen_client().close()
+        get_qianwen_client.cache_clear()
+
+
 class LLMReportGenerator:
     """LLM 报告生成器"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, client: Optional[QianwenVisionClient] = None):
         """
         初始化生成器
 
         Args:
             db: 数据库会话
+            client: 千问客户端（默认使用全局共享实例）
         """
         self.db = db
-        self.qianwen_client = QianwenVisionClient(
-            api_key=settings.QIANWEN_API_KEY,
-            model=settings.QIANWEN_VISION_MODEL
-        )
+        self.qianwen_client = client or get_qianwen_client()
         self.frame_matcher = FrameMatcherService(db)
 
     def generate_report(self, session_id: str, evidence_pack: EvidencePack) -> AReport:
@@ -57,7 +80,7 @@ class LLMReportGenerator:
         4. 解析返回结果（含 token 统计）
         5. 保存报告到数据库
         """
-        print(f"[LLM] 开始生成报告: session_id={session_id}")
+        logger.info("[LLM] 开始生成报告: session_id=%s", session_id)
 
         # 第一步：查询 Session
         session = self.db.query(ASession).filter_by(id=session_id).first()
@@ -72,7 +95,7 @@ class LLMReportGenerator:
         if session.session_type == "quick_check":
             baseline_frames = self._get_baseline_middle_frames(session.user_id)
             if baseline_frames:
-                print(f"[LLM] 获取到 {len(baseline_frames)} 个区域的基线中间帧进行对比")
+                logger.debug("[LLM] 获取到 %d 个区域的基线中间帧进行对比", len(baseline_frames))
 
         # 第四步：调用千问 Vision API
         try:
@@ -84,32 +107,31 @@ class LLMReportGenerator:
         except Exception as e:
             raise LLMClientError(f"千问 API 调用失败: {str(e)}")
 
-        print(f"[LLM] 千问 API 调用成功，生成报告长度: {len(llm_result.text)} 字符")
-        print(f"[LLM] Token 消耗: input={llm_result.input_tokens}, output={llm_result.output_tokens}, total={llm_result.total_tokens}")
+        logger.info("[LLM] 千问 API 调用成功，生成报告长度: %d 字符", len(llm_result.text))
+        logger.info("[LLM] Token 消耗: input=%d, output=%d, total=%d",
+                    llm_result.input_tokens, llm_result.output_tokens, llm_result.total_tokens)
 
-        # 第五步：查询数据库中的 EvidencePack 以获取 evidence_pack_id
-        db_evidence_pack = self.db.query(AEvidencePack).filter_by(session_id=session_id).first()
-        if not db_evidence_pack:
+        # 第五步：查询 EvidencePack 的 id（只取主键列，不加载 pack_json）
+        evidence_pack_id = self.db.query(AEvidencePack.id).filter_by(session_id=session_id).scalar()
+        if not evidence_pack_id:
             raise LLMClientError(f"EvidencePack 不存在: {session_id}")
 
         # 第六步：保存报告到数据库（含 token 统计）
         report = AReport(
             session_id=session_id,
-            evidence_pack_id=db_evidence_pack.id,
+            evidence_pack_id=evidence_pack_id,
             report_text=llm_result.text,
-            llm_model=settings.QIANWEN_VISION_MODEL,
+            llm_model=self.qianwen_client.model,
             tokens_used=llm_result.total_tokens
         )
-
         self.db.add(report)
-        self.db.commit()
-        self.db.refresh(report)
 
-        # 第七步：更新 Session 状态
+        # 第七步：更新 Session 状态，与报告一并提交
         session.processing_status = "completed"
         self.db.commit()
+        self.db.refresh(report)
 
-        print(f"[LLM] 报告已保存: {report.id}, tokens_used={llm_result.total_tokens}")
+        logger.info("[LLM] 报告已保存: %s, tokens_used=%d", report.id, llm_result.total_tokens)
 
         return report
 
@@ -123,8 +145,6 @@ class LLMReportGenerator:
         Returns:
             KeyframeData 列表（按 zone_id 排序，最多7帧）
         """
-        import json
-
         middle_frames_dict = self.frame_matcher.get_zone_middle_frames(user_id)
 
         if not middle_frames_dict:
@@ -136,22 +156,11 @@ class LLMReportGenerator:
         for zone_id in sorted(middle_frames_dict.keys()):
             db_frame: AKeyframe = middle_frames_dict[zone_id]
 
-            # 解析 meta_tags
-            tags_source = db_frame.meta_tags
-            if isinstance(tags_source, str):
-                try:
-                    tags_dict = json.loads(tags_source)
-                except:
-                    tags_dict = {}
-            elif isinstance(tags_source, dict):
-                tags_dict = tags_source
-            else:
-                tags_dict = {}
-
-            meta_tags = FrameMetaTags(**tags_dict)
-
-            # 构建 KeyframeData
-            kf_data = KeyframeData(
+            # 解析 meta_tags（JSONB 列，驱动已解析为 dict）
+            meta_tags = FrameMetaTags.from_trusted_dict(db_frame.meta_tags or {})
+
+            # 构建 KeyframeData（字段均来自数据库，跳过校验）
+            kf_data = KeyframeData.model_construct(
                 frame_id=str(db_frame.id),
                 timestamp=db_frame.timestamp_in_video,
                 image_url=str(db_frame.image_path),
@@ -3,13 +3,50 @@
 用户档案管理
 管理用户的基线数据、Quick Check 记录、事件和关注点
 """
+import logging
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from sqlalchemy.orm import Session
 from sqlalchemy.orm.attributes import flag_modified
-from sqlalchemy import and_, or_
+from sqlalchemy.engine import Row
+from sqlalchemy import and_, or_, select, func
 
 from app.models.database import AUserProfile, ASession, AUserEvent, AConcernPoint
+from app.models.evidence_pack import EVENT_TYPE_DISPLAY_NAMES
+
+logger = logging.getLogger(__name__)
+
+
+# 列表查询投影列：直接返回行元组，跳过 ORM 对象构建与 identity map
+EVENT_LIST_COLUMNS = (
+    AUserEvent.id,
+    AUserEvent.user_id,
+    AUserEvent.event_type,
+    AUserEvent.event_date,
+    AUserEvent.event_description,
+    AUserEvent.related_session_id,
+    AUserEvent.event_metadata,
+    AUserEvent.created_at,
+)
+
+CONCERN_LIST_COLUMNS = (
+    AConcernPoint.id,
+    AConcernPoint.user_id,
+    AConcernPoint.source_type,
+    AConcernPoint.zone_id,
+    AConcernPoint.location_description,
+    AConcernPoint.concern_type,
+    AConcernPoint.concern_description,
+    AConcernPoint.severity,
+    AConcernPoint.status,
+    AConcernPoint.first_detected_at,
+    AConcernPoint.last_observed_at,
+    AConcernPoint.resolved_at,
+    AConcernPoint.related_sessions,
+    AConcernPoint.evidence_frame_ids,
+    AConcernPoint.created_at,
+    AConcernPoint.updated_at,
+)
 
 
 class ProfileManagerError(Exception):
@@ -20,6 +57,9 @@ class ProfileManagerError(Exception):
 class ProfileManager:
     """用户档案管理器"""
 
+    # 事件类型显示名称映射
+    EVENT_TYPE_DISPLAY_MAP: Dict[str, str] = EVENT_TYPE_DISPLAY_NAMES
+
     def __init__(self, db: Session):
         """
         初始化管理器
@@ -29,12 +69,20 @@ class ProfileManager:
         """
         self.db = db
 
-    def get_or_create_profile(self, user_id: str) -> AUserProfile:
+    def _commit(self, commit: bool):
+        """提交事务；commit=False 时仅 flush，由调用方统一提交"""
+        if commit:
+            self.db.commit()
+        else:
+            self.db.flush()
+
+    def get_or_create_profile(self, user_id: str, commit: bool = True) -> AUserProfile:
         """
         获取或创建用户档案
 
         Args:
             user_id: 用户ID
+            commit: 是否立即提交（False 时由调用方统一提交）
 
         Returns:
             用户档案对象
@@ -44,13 +92,13 @@ class ProfileManager:
         if not profile:
             profile = AUserProfile(user_id=user_id)
             self.db.add(profile)
-            self.db.commit()
+            self._commit(commit)
             self.db.refresh(profile)
-            print(f"[档案] 创建新用户档案: {user_id}")
+            logger.info("[档案] 创建新用户档案: %s", user_id)
 
         return profile
 
-    def mark_baseline_completed(self, user_id: str, zone_id: int, session_id: str):
+    def mark_baseline_completed(self, user_id: str, zone_id: int, session_id: str, commit: bool = True):
         """
         标记用户的某个区域基线已完成
 
@@ -58,8 +106,9 @@ class ProfileManager:
             user_id: 用户ID
             zone_id: 区域ID (1-7)
             session_id: 基线 Session ID
+            commit: 是否立即提交（False 时由调用方统一提交）
         """
-        profile = self.get_or_create_profile(user_id)
+        profile = self.get_or_create_profile(user_id, commit=commit)
 
         # 更新基线映射 - 创建新字典副本以确保 SQLAlchemy 检测到变化
         baseline_map = dict(profile.baseline_zone_map or {})
@@ -73,22 +122,23 @@ class ProfileManager:
         if len(baseline_map) == 7:
             profile.baseline_completed = True
             profile.baseline_completion_date = datetime.now()
-            print(f"[档案] 用户 {user_id} 已完成所有7个区域的基线！")
+            logger.info("[档案] 用户 %s 已完成所有7个区域的基线！", user_id)
 
-        self.db.commit()
-        print(f"[档案] 用户 {user_id} 区域 {zone_id} 基线已标记完成, 当前进度: {len(baseline_map)}/7")
+        self._commit(commit)
+        logger.info("[档案] 用户 %s 区域 %s 基线已标记完成, 当前进度: %d/7", user_id, zone_id, len(baseline_map))
 
-    def record_quick_check(self, user_id: str):
+    def record_quick_check(self, user_id: str, commit: bool = True):
         """
         记录一次 Quick Check
 
         Args:
             user_id: 用户ID
+            commit: 是否立即提交（False 时由调用方统一提交）
         """
-        profile = self.get_or_create_profile(user_id)
+        profile = self.get_or_create_profile(user_id, commit=commit)
         profile.total_quick_checks += 1
         profile.last_check_date = datetime.utcnow()
-        self.db.commit()
+        self._commit(commit)
 
     def get_baseline_session(self, user_id: str, zone_id: int) -> Optional[str]:
         """
@@ -118,6 +168,19 @@ class ProfileManager:
         profile = self.get_or_create_profile(user_id)
         return profile.baseline_completed
 
+    def get_baseline_progress(self, user_id: str) -> int:
+        """
+        获取用户已完成基线的分区数量（只读，不创建档案）
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            已完成的分区数量（0-7）
+        """
+        baseline_map = self.db.query(AUserProfile.baseline_zone_map).filter_by(user_id=user_id).scalar()
+        return len(baseline_map or {})
+
     # ========================================
     # 用户事件管理
     # ========================================
@@ -160,7 +223,7 @@ class ProfileManager:
         self.db.commit()
         self.db.refresh(event)
 
-        print(f"[档案] 用户 {user_id} 添加事件: {event_type}")
+        logger.debug("[档案] 用户 %s 添加事件: %s", user_id, event_type)
         return event
 
     def get_user_events(
@@ -170,7 +233,7 @@ class ProfileManager:
         end_date: Optional[datetime] = None,
         event_type: Optional[str] = None,
         limit: int = 50
-    ) -> List[AUserEvent]:
+    ) -> List[Row]:
         """
         获取用户事件列表
 
@@ -182,18 +245,19 @@ class ProfileManager:
             limit: 返回数量限制
 
         Returns:
-            事件列表
+            事件行列表（只读投影，字段见 EVENT_LIST_COLUMNS）
         """
-        query = self.db.query(AUserEvent).filter_by(user_id=user_id)
+        query = select(*EVENT_LIST_COLUMNS).where(AUserEvent.user_id == user_id)
 
         if start_date:
-            query = query.filter(AUserEvent.event_date >= start_date)
+            query = query.where(AUserEvent.event_date >= start_date)
         if end_date:
-            query = query.filter(AUserEvent.event_date <= end_date)
+            query = query.where(AUserEvent.event_date <= end_date)
         if event_type:
-            query = query.filter(AUserEvent.event_type == event_type)
+            query = query.where(AUserEvent.event_type == event_type)
 
-        return query.order_by(AUserEvent.event_date.desc()).limit(limit).all()
+        query = query.order_by(AUserEvent.event_date.desc()).limit(limit)
+        return self.db.execute(query).all()
 
     def delete_user_event(self, event_id: str) -> bool:
         """
@@ -267,7 +331,7 @@ class ProfileManager:
         self.db.commit()
         self.db.refresh(concern)
 
-        print(f"[档案] 用户 {user_id} 添加关注点: {concern_type}")
+        logger.debug("[档案] 用户 %s 添加关注点: %s", user_id, concern_type)
         return concern
 
     def update_concern_status(
@@ -306,7 +370,7 @@ class ProfileManager:
         self.db.commit()
         self.db.refresh(concern)
 
-        print(f"[档案] 更新关注点 {concern_id} 状态为: {new_status}")
+        logger.debug("[档案] 更新关注点 %s 状态为: %s", concern_id, new_status)
         return concern
 
     def get_active_concerns(self, user_id: str) -> List[AConcernPoint]:
@@ -332,7 +396,7 @@ class ProfileManager:
         user_id: str,
         status: Optional[str] = None,
         limit: int = 50
-    ) -> List[AConcernPoint]:
+    ) -> List[Row]:
         """
         获取用户所有关注点
 
@@ -342,14 +406,15 @@ class ProfileManager:
             limit: 返回数量限制
 
         Returns:
-            关注点列表
+            关注点行列表（只读投影，字段见 CONCERN_LIST_COLUMNS）
         """
-        query = self.db.query(AConcernPoint).filter_by(user_id=user_id)
+        query = select(*CONCERN_LIST_COLUMNS).where(AConcernPoint.user_id == user_id)
 
         if status:
-            query = query.filter(AConcernPoint.status == status)
+            query = query.where(AConcernPoint.status == status)
 
-        return query.order_by(AConcernPoint.last_observed_at.desc()).limit(limit).all()
+        query = query.order_by(AConcernPoint.last_observed_at.desc()).limit(limit)
+        return self.db.execute(query).all()
 
     def update_concern_observation(
         self,
@@ -530,18 +595,7 @@ class ProfileManager:
 
     def _get_event_type_display(self, event_type: str) -> str:
         """获取事件类型的显示名称"""
-        display_map = {
-            "dental_cleaning": "洁牙",
-            "scaling": "洗牙/龈下刮治",
-            "filling": "补牙",
-            "extraction": "拔牙",
-            "crown": "牙冠/烤瓷牙",
-            "orthodontic": "正畸调整",
-            "whitening": "美白",
-            "checkup": "口腔检查",
-            "other": "其他"
-        }
-        return display_map.get(event_type, event_type)
+        return self.EVENT_TYPE_DISPLAY_MAP.get(event_type, event_type)
 
     def get_extended_profile(self, user_id: str) -> Dict:
         """
@@ -555,22 +609,30 @@ class ProfileManager:
         """
         profile = self.get_or_create_profile(user_id)
 
-        # 统计活跃关注点
-        active_concerns_count = (
-            self.db.query(AConcernPoint)
-            .filter_by(user_id=user_id)
-            .filter(AConcernPoint.status.in_(["active", "monitoring"]))
-            .count()
-        )
-
-        # 统计近30天事件
+        # 活跃关注点数与近30天事件数：两个标量子查询合并为一次往返，
+        # 分别走 (user_id, status) 与 (user_id, event_date) 复合索引
         thirty_days_ago = datetime.now() - timedelta(days=30)
-        recent_events_count = (
-            self.db.query(AUserEvent)
-            .filter_by(user_id=user_id)
-            .filter(AUserEvent.event_date >= thirty_days_ago)
-            .count()
+        active_concerns_query = (
+            select(func.count())
+            .select_from(AConcernPoint)
+            .where(
+                AConcernPoint.user_id == user_id,
+                AConcernPoint.status.in_(["active", "monitoring"])
+            )
+            .scalar_subquery()
+        )
+        recent_events_query = (
+            select(func.count())
+            .select_from(AUserEvent)
+            .where(
+                AUserEvent.user_id == user_id,
+                AUserEvent.event_date >= thirty_days_ago
+            )
+            .scalar_subquery()
         )
+        active_concerns_count, recent_events_count = self.db.execute(
+            select(active_concerns_query, recent_events_query)
+        ).one()
 
         return {
             "user_id": profile.user_id,
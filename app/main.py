@@ -5,12 +5,18 @@ Entry point for the application.
 """
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.config import settings
-from app.config import ensure_directories
+from app.config import get_settings, ensure_directories, setup_logging
 from app.api import upload, user, session, report, profile
+from app.api.middleware import ETagMiddleware
+from app.services.cache import response_cache
+from app.core.llm_client import close_qianwen_client
+
+settings = get_settings()
+setup_logging()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -26,6 +32,8 @@ async def lifespan(app: FastAPI):
     yield
     # Shutdown 逻辑 (如有需要可以在这里添加)
     print("System shutting down...")
+    await response_cache.close()
+    close_qianwen_client()
 
 # Create FastAPI application
 app = FastAPI(
@@ -33,6 +41,7 @@ app = FastAPI(
     version=settings.APP_VERSION,
     description="Oral Health Monitoring System API (V1)",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # C 实现的 JSON 编码，加速大列表响应
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -46,6 +55,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ETag / If-None-Match support for GET endpoints
+app.add_middleware(ETagMiddleware)
+
 # ========================================
 # Include Routers (Modular Design)
 # ========================================
@@ -4,14 +4,15 @@
 基于 SQLAlchemy
 """
 from datetime import datetime
-from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, Text, BigInteger, TIMESTAMP, ForeignKey, CheckConstraint, UniqueConstraint
+from sqlalchemy import create_engine, Column, String, Integer, Float, Boolean, Text, BigInteger, TIMESTAMP, ForeignKey, CheckConstraint, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy.orm import Session, sessionmaker, relationship
 from sqlalchemy.sql import func
 import uuid
+from functools import lru_cache
 
-from app.config import settings
+from app.config import get_settings
 
 # 创建基类
 Base = declarative_base()
@@ -79,6 +80,7 @@ class ASession(Base):
         CheckConstraint("session_type IN ('quick_check', 'baseline')", name="check_a_session_type"),
         CheckConstraint("zone_id BETWEEN 1 AND 7", name="check_a_zone_id"),
         CheckConstraint("processing_status IN ('pending', 'processing', 'completed', 'failed')", name="check_processing_status"),
+        Index("idx_a_sessions_user_type_status_created", "user_id", "session_type", "processing_status", created_at.desc()),
     )
 
 
@@ -129,6 +131,9 @@ class AEvidencePack(Base):
     baseline_reference_json = Column(JSONB, nullable=True)
     comparison_mode = Column(String(20), default="none")
 
+    # 新增：生成输入摘要（输入未变化时跳过重新生成）
+    cache_key = Column(String(64), nullable=True)
+
     # 关系
     session = relationship("ASession", back_populates="evidence_pack")
     reports = relationship("AReport", back_populates="evidence_pack", cascade="all, delete-orphan")
@@ -188,6 +193,7 @@ class AUserEvent(Base):
 
     __table_args__ = (
         CheckConstraint("event_type IN ('dental_cleaning', 'scaling', 'filling', 'extraction', 'crown', 'orthodontic', 'whitening', 'checkup', 'other')", name="check_event_type"),
+        Index("idx_user_events_user_date", "user_id", "event_date"),
     )
 
 
@@ -220,6 +226,7 @@ class AConcernPoint(Base):
         CheckConstraint("severity IN ('mild', 'moderate', 'severe')", name="check_concern_severity"),
         CheckConstraint("status IN ('active', 'resolved', 'monitoring')", name="check_concern_status"),
         CheckConstraint("zone_id IS NULL OR (zone_id BETWEEN 1 AND 7)", name="check_concern_zone_id"),
+        Index("idx_concern_points_user_status", "user_id", "status"),
     )
 
 
@@ -282,15 +289,29 @@ class CAnnotation(Base):
 # 数据库连接与会话管理
 # ========================================
 
-# 创建引擎
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,  # 自动重连
-    echo=settings.DEBUG,  # Debug 模式显示 SQL
-)
+@lru_cache(maxsize=1)
+def get_engine():
+    """创建数据库引擎（首次使用时按当前配置创建，之后复用同一连接池）"""
+    settings = get_settings()
+    return create_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,  # 常驻连接数
+        max_overflow=settings.DB_MAX_OVERFLOW,  # 突发负载时的额外连接数
+        pool_timeout=settings.DB_POOL_TIMEOUT,  # 等待空闲连接的超时（秒）
+        pool_recycle=settings.DB_POOL_RECYCLE,  # 定期回收连接，避免被服务端断开
+        pool_pre_ping=True,  # 自动重连
+        echo=settings.DEBUG,  # Debug 模式显示 SQL
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_session_factory() -> sessionmaker:
+    return sessionmaker(autocommit=False, autoflush=False, bind=get_engine())
+
 
-# 创建会话工厂
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def SessionLocal() -> Session:
+    """创建数据库会话（会话工厂在首次调用时绑定引擎）"""
+    return _get_session_factory()()
 
 
 def get_db():
@@ -304,11 +325,11 @@ def get_db():
 
 def init_db():
     """初始化数据库（创建所有表）"""
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
     print("[数据库] 表初始化完成")
 
 
 def drop_all_tables():
     """删除所有表（危险操作，仅用于开发）"""
-    Base.metadata.drop_all(bind=engine)
+    Base.metadata.drop_all(bind=get_engine())
     print("[数据库] 所有表已删除")
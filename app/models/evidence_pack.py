@@ -44,6 +44,19 @@ ZONE_DISPLAY_NAMES: Dict[int, str] = {
     7: "可选-最后磨牙特殊区",
 }
 
+# 用户事件类型显示名称（档案管理与证据包共用）
+EVENT_TYPE_DISPLAY_NAMES: Dict[str, str] = {
+    "dental_cleaning": "洁牙",
+    "scaling": "洗牙/龈下刮治",
+    "filling": "补牙",
+    "extraction": "拔牙",
+    "crown": "牙冠/烤瓷牙",
+    "orthodontic": "正畸调整",
+    "whitening": "美白",
+    "checkup": "口腔检查",
+    "other": "其他",
+}
+
 
 # ========================================
 # 牙齿与区域枚举
@@ -94,6 +107,25 @@ class FrameMetaTags(BaseModel):
     confidence_score: float = Field(default=0.0, ge=0.0, le=1.0, description="分类置信度")
     is_verified: bool = Field(default=False, description="是否人工校验过")
 
+    @classmethod
+    def from_trusted_dict(cls, data: Dict) -> "FrameMetaTags":
+        """
+        从本系统写入的 meta_tags 字典构建（跳过 Pydantic 校验）
+
+        只做枚举转换；数据不符合预期时回退到完整校验。
+        """
+        try:
+            return cls.model_construct(
+                side=ToothSide(data.get("side", "unknown")),
+                tooth_type=ToothType(data.get("tooth_type", "unknown")),
+                region=Region(data.get("region", "unknown")),
+                detected_issues=[DetectedIssue(i) for i in data.get("detected_issues") or ()],
+                confidence_score=float(data.get("confidence_score") or 0.0),
+                is_verified=bool(data.get("is_verified", False))
+            )
+        except (ValueError, TypeError):
+            return cls(**data)
+
     class Config:
         json_schema_extra = {
             "example": {
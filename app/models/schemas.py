@@ -214,6 +214,22 @@ class UserEventResponse(BaseModel):
     metadata: Dict = Field(default_factory=dict, description="附加元数据")
     created_at: str = Field(..., description="创建时间")
 
+    @classmethod
+    def from_orm_row(cls, event) -> "UserEventResponse":
+        """
+        从 AUserEvent 对象或查询行构建响应（数据库数据可信，跳过校验）
+        """
+        return cls.model_construct(
+            id=str(event.id),
+            user_id=event.user_id,
+            event_type=event.event_type,
+            event_date=event.event_date.isoformat(),
+            event_description=event.event_description,
+            related_session_id=str(event.related_session_id) if event.related_session_id else None,
+            metadata=event.event_metadata or {},
+            created_at=event.created_at.isoformat()
+        )
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -280,6 +296,31 @@ class ConcernPointResponse(BaseModel):
     created_at: str = Field(..., description="创建时间")
     updated_at: str = Field(..., description="更新时间")
 
+    @classmethod
+    def from_orm_row(cls, concern) -> "ConcernPointResponse":
+        """
+        从 AConcernPoint 对象或查询行构建响应（数据库数据可信，跳过校验）
+        """
+        created_at = concern.created_at.isoformat()
+        return cls.model_construct(
+            id=str(concern.id),
+            user_id=concern.user_id,
+            source_type=concern.source_type,
+            zone_id=concern.zone_id,
+            location_description=concern.location_description,
+            concern_type=concern.concern_type,
+            concern_description=concern.concern_description,
+            severity=concern.severity,
+            status=concern.status,
+            first_detected_at=concern.first_detected_at.isoformat(),
+            last_observed_at=concern.last_observed_at.isoformat(),
+            resolved_at=concern.resolved_at.isoformat() if concern.resolved_at else None,
+            related_sessions=concern.related_sessions or [],
+            evidence_frame_ids=concern.evidence_frame_ids or [],
+            created_at=created_at,
+            updated_at=concern.updated_at.isoformat() if concern.updated_at else created_at
+        )
+
     class Config:
         json_schema_extra = {
             "example": {
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+响应缓存服务
+基于 Redis 缓存只读 GET 端点的 JSON 响应，写操作时按用户失效
+"""
+import functools
+import inspect
+import logging
+from typing import Callable
+
+from fastapi import Response
+from fastapi.concurrency import run_in_threadpool
+
+from app.config import Settings, get_settings
+
+try:
+    # 可选依赖：未安装 redis 或未配置 REDIS_URL 时缓存自动停用
+    import redis.asyncio as aioredis
+    from redis.exceptions import RedisError
+except ImportError:
+    aioredis = None
+    RedisError = OSError
+
+logger = logging.getLogger(__name__)
+
+
+async def _call_handler(func, *args, **kwargs):
+    """调用被装饰的端点：同步函数（阻塞的数据库访问）放入线程池执行"""
+    if inspect.iscoroutinefunction(func):
+        return await func(*args, **kwargs)
+    return await run_in_threadpool(func, *args, **kwargs)
+
+
+class ResponseCache:
+    """按用户划分命名空间的响应缓存"""
+
+    KEY_PREFIX = "profile"
+
+    def __init__(self, config: Callable[[], Settings] = get_settings):
+        """
+        初始化缓存
+
+        配置在首次使用时才读取，导入模块不会固定 Redis 地址，测试可在使用前覆盖。
+
+        Args:
+            config: 返回配置的工厂（读取 REDIS_URL 与 RESPONSE_CACHE_TTL）；
+                REDIS_URL 为空时缓存停用
+        """
+        self._config = config
+        self._client = None
+
+    @property
+    def url(self):
+        return self._config().REDIS_URL
+
+    @property
+    def ttl(self) -> int:
+        return self._config().RESPONSE_CACHE_TTL
+
+    @property
+    def enabled(self) -> bool:
+        return aioredis is not None and bool(self.url)
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = aioredis.from_url(self.url)
+        return self._client
+
+    def _build_key(self, user_id: str, namespace: str, params: dict) -> str:
+        """
+        构建缓存键：profile:{user_id}:{namespace}:{k=v&...}
+
+        只使用标量参数（查询参数），依赖注入的 db 等对象不参与键计算。
+        """
+        query = "&".join(
+            f"{k}={v}" for k, v in sorted(params.items())
+            if k != "user_id" and (v is None or isinstance(v, (str, int, float, bool)))
+        )
+        return f"{self.KEY_PREFIX}:{user_id}:{namespace}:{query}"
+
+    def cached(self, namespace: str):
+        """
+        GET 端点缓存装饰器
+
+        命中时直接返回缓存的 JSON，跳过数据库查询与响应模型序列化；
+        Redis 不可用时退化为直接调用被装饰函数。同步端点在线程池中执行。
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await _call_handler(func, *args, **kwargs)
+
+                key = self._build_key(kwargs["user_id"], namespace, kwargs)
+                try:
+                    hit = await self._get_client().get(key)
+                except (RedisError, OSError):
+                    logger.warning("[缓存] 读取失败，回退数据库: key=%s", key, exc_info=True)
+                    return await _call_handler(func, *args, **kwargs)
+
+                if hit is not None:
+                    return Response(content=hit, media_type="application/json")
+
+                result = await _call_handler(func, *args, **kwargs)
+                try:
+                    await self._get_client().set(key, result.model_dump_json(), ex=self.ttl)
+                except (RedisError, OSError):
+                    logger.warning("[缓存] 写入失败: key=%s", key, exc_info=True)
+                return result
+
+            return wrapper
+        return decorator
+
+    def invalidates(self, func):
+        """
+        写操作端点装饰器：端点成功返回后失效该用户的缓存
+
+        同步端点在线程池中执行。
+        """
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            result = await _call_handler(func, *args, **kwargs)
+            await self.invalidate_user(kwargs["user_id"])
+            return result
+
+        return wrapper
+
+    async def invalidate_user(self, user_id: str):
+        """
+        失效指定用户的全部缓存响应
+
+        Args:
+            user_id: 用户ID
+        """
+        if not self.enabled:
+            return
+        client = self._get_client()
+        try:
+            keys = [key async for key in client.scan_iter(match=f"{self.KEY_PREFIX}:{user_id}:*")]
+            if keys:
+                await client.delete(*keys)
+        except (RedisError, OSError):
+            # 失效失败时该用户在 TTL 内会读到旧数据
+            logger.warning("[缓存] 失效失败，旧响应将保留至 TTL 过期: user=%s", user_id, exc_info=True)
+
+    async def close(self):
+        """关闭 Redis 连接"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# 单例模式（配置延迟到首次请求时读取）
+response_cache = ResponseCache()
@@ -4,14 +4,25 @@
 封装千问多模态 API 调用
 """
 import json
-import base64
-from pathlib import Path
+import logging
+import mmap
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional
 import requests
+from requests.adapters import HTTPAdapter
 
 from dataclasses import dataclass
 from app.models.evidence_pack import EvidencePack, KeyframeData
 
+try:
+    # 可选依赖：SIMD 加速的 Base64 编码，未安装时回退标准库
+    from pybase64 import b64encode
+except ImportError:
+    from base64 import b64encode
+
+logger = logging.getLogger(__name__)
+
 
 class QianwenAPIError(Exception):
     """千问 API 异常"""
@@ -33,10 +44,19 @@ class QianwenVisionClient:
     # 限制发送的图像数量（避免请求过大超时）
     MAX_IMAGES_PER_REQUEST = 8
 
+    # 并行读取/编码图像的线程数（文件读取与 Base64 编码均释放 GIL）
+    IMAGE_LOAD_WORKERS = 8
+
+    # 连接池大小（对应并发的报告请求数）
+    POOL_MAXSIZE = 20
+
     def __init__(self, api_key: str, model: str = "qwen-vl-max"):
         """
         初始化客户端
 
+        每个线程持有各自的 requests.Session（requests.Session 非线程安全），
+        同一线程的多次调用复用 keep-alive 连接，省去每次请求的 TCP/TLS 握手。
+
         Args:
             api_key: 千问 API Key
             model: 模型名称（默认 qwen-vl-max）
@@ -45,6 +65,34 @@ class QianwenVisionClient:
         self.model = model
         self.api_url = "https://dashscope.aliyuncs.com/api/v1/services/aigc/multimodal-generation/generation"
 
+        self._local = threading.local()
+        self._sessions: List[requests.Session] = []
+        self._sessions_lock = threading.Lock()
+
+    @property
+    def http(self) -> requests.Session:
+        """当前线程专属的 HTTP 会话（首次访问时创建）"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_maxsize=self.POOL_MAXSIZE))
+            session.headers.update({
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json"
+            })
+            self._local.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def close(self):
+        """关闭所有线程的连接池"""
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            session.close()
+        self._local = threading.local()
+
     def analyze_evidence_pack(self, evidence_pack: EvidencePack, prompt: str,
                                baseline_frames: List[KeyframeData] = None) -> LLMResponse:
         """
@@ -61,9 +109,9 @@ class QianwenVisionClient:
         Raises:
             QianwenAPIError: API 调用失败
         """
-        print(f"[千问] 开始分析 EvidencePack: {len(evidence_pack.frames)} 帧")
+        logger.info("[千问] 开始分析 EvidencePack: %d 帧", len(evidence_pack.frames))
         if baseline_frames:
-            print(f"[千问] 包含 {len(baseline_frames)} 帧基线数据进行对比")
+            logger.info("[千问] 包含 %d 帧基线数据进行对比", len(baseline_frames))
 
         # 第一步：构建消息内容
         message_content = self._build_message_content(evidence_pack, prompt, baseline_frames)
@@ -85,17 +133,11 @@ class QianwenVisionClient:
             }
         }
 
-        # 第三步：调用 API
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
+        # 第三步：调用 API（鉴权头已设置在 Session 上）
         try:
             # 增加超时时间：连接超时 30s，读取超时 180s
-            response = requests.post(
+            response = self.http.post(
                 self.api_url,
-                headers=headers,
                 json=payload,
                 timeout=(30, 180)
             )
@@ -126,6 +168,23 @@ class QianwenVisionClient:
         Returns:
             消息内容列表（包含文本和图像）
         """
+        # 选择最有代表性的帧（优先选择异常分数高的帧）
+        # 如果有基线帧，需要减少当前帧数量以控制总数
+        max_current_frames = self.MAX_IMAGES_PER_REQUEST
+        if baseline_frames:
+            max_current_frames = max(4, self.MAX_IMAGES_PER_REQUEST - len(baseline_frames))
+
+        frames_to_send = self._select_representative_frames(evidence_pack.frames, max_current_frames)
+        logger.debug("[千问] 选择 %d 帧发送 (共 %d 帧)", len(frames_to_send), len(evidence_pack.frames))
+
+        # 基线帧与当前帧的图像一次性并行加载，结果保持原顺序
+        baseline_frames = baseline_frames or []
+        images = self._load_images_as_base64(
+            [frame.image_url for frame in baseline_frames + frames_to_send]
+        )
+        baseline_images = images[:len(baseline_frames)]
+        current_images = images[len(baseline_frames):]
+
         content = []
 
         # 第一项：文本提示词
@@ -138,8 +197,7 @@ class QianwenVisionClient:
             content.append({
                 "text": "\n\n===== 基线数据（历史参考）====="
             })
-            for idx, frame in enumerate(baseline_frames):
-                image_base64 = self._load_image_as_base64(frame.image_url)
+            for idx, (frame, image_base64) in enumerate(zip(baseline_frames, baseline_images)):
                 if image_base64:
                     content.append({
                         "image": f"data:image/jpeg;base64,{image_base64}"
@@ -161,20 +219,8 @@ class QianwenVisionClient:
                 "text": "\n\n===== 本次检查数据 ====="
             })
 
-        # 选择最有代表性的帧（优先选择异常分数高的帧）
-        # 如果有基线帧，需要减少当前帧数量以控制总数
-        max_current_frames = self.MAX_IMAGES_PER_REQUEST
-        if baseline_frames:
-            max_current_frames = max(4, self.MAX_IMAGES_PER_REQUEST - len(baseline_frames))
-
-        frames_to_send = self._select_representative_frames(evidence_pack.frames, max_current_frames)
-        print(f"[千问] 选择 {len(frames_to_send)} 帧发送 (共 {len(evidence_pack.frames)} 帧)")
-
         # 后续项：关键帧图像
-        for idx, frame in enumerate(frames_to_send):
-            # 从文件路径读取图像并转换为 base64
-            image_base64 = self._load_image_as_base64(frame.image_url)
-
+        for idx, (frame, image_base64) in enumerate(zip(frames_to_send, current_images)):
             if image_base64:
                 # 添加图像
                 content.append({
@@ -248,6 +294,23 @@ class QianwenVisionClient:
 
         return selected
 
+    def _load_images_as_base64(self, image_paths: List[str]) -> List[Optional[str]]:
+        """
+        并行加载多张图像并转换为 base64
+
+        Args:
+            image_paths: 图像文件路径列表
+
+        Returns:
+            与输入顺序一致的 Base64 字符串列表，失败项为 None
+        """
+        if len(image_paths) <= 1:
+            return [self._load_image_as_base64(p) for p in image_paths]
+
+        workers = min(self.IMAGE_LOAD_WORKERS, len(image_paths))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self._load_image_as_base64, image_paths))
+
     def _load_image_as_base64(self, image_path: str) -> Optional[str]:
         """
         从文件路径加载图像并转换为 base64
@@ -259,17 +322,17 @@ class QianwenVisionClient:
             Base64 编码的图像字符串，失败返回 None
         """
         try:
-            path = Path(image_path)
-            if not path.exists():
-                print(f"[警告] 图像文件不存在: {image_path}")
-                return None
+            # mmap 映射文件直接编码，避免先读出一份原始字节副本
+            with open(image_path, "rb") as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return b64encode(mm).decode("ascii")
 
-            with open(path, "rb") as f:
-                image_data = f.read()
-                return base64.b64encode(image_data).decode("utf-8")
+        except FileNotFoundError:
+            logger.warning("[警告] 图像文件不存在: %s", image_path)
+            return None
 
-        except Exception as e:
-            print(f"[警告] 读取图像失败 {image_path}: {e}")
+        except Exception:
+            logger.warning("[警告] 读取图像失败: %s", image_path, exc_info=True)
             return None
 
     def _extract_response_text(self, response_data: Dict[str, Any]) -> str:
@@ -344,7 +407,7 @@ class QianwenVisionClient:
             output_tokens = usage.get("output_tokens", 0)
             total_tokens = usage.get("total_tokens", input_tokens + output_tokens)
 
-            print(f"[千问] Token 使用: input={input_tokens}, output={output_tokens}, total={total_tokens}")
+            logger.info("[千问] Token 使用: input=%d, output=%d, total=%d", input_tokens, output_tokens, total_tokens)
 
             return LLMResponse(
                 text=text,
@@ -388,15 +451,9 @@ class QianwenVisionClient:
             }
         }
 
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-
         try:
-            response = requests.post(
+            response = self.http.post(
                 self.api_url,
-                headers=headers,
                 json=payload,
                 timeout=30
             )
@@ -5,62 +5,95 @@
 """
 import os
 import shutil
+from functools import cached_property
 from pathlib import Path
 from typing import Union
 import cv2
 import numpy as np
 
-from app.config import settings
+from app.config import get_settings
 
 class StorageService:
-    def __init__(self):
-        self.root = settings.DATA_ROOT_PATH
-                
-        self.b_stream = self.root / "b_stream"
-        self.a_stream = self.root / "a_stream" 
-        self.c_stream = self.root / "c_stream"
-        
-        # 确保目录结构存在
-        self._ensure_dirs()
+    """
+    存储根目录在首次使用时才从配置解析并创建，导入模块不读取配置、不触碰文件系统
+    """
+
+    @cached_property
+    def root(self) -> Path:
+        return get_settings().DATA_ROOT_PATH
+
+    @cached_property
+    def b_stream(self) -> Path:
+        return self._ensure_dir(self.root / "b_stream")
+
+    @cached_property
+    def a_stream(self) -> Path:
+        return self._ensure_dir(self.root / "a_stream")
 
-    def _ensure_dirs(self):
-        for p in [self.b_stream, self.a_stream, self.c_stream]:
-            p.mkdir(parents=True, exist_ok=True)
+    @cached_property
+    def c_stream(self) -> Path:
+        return self._ensure_dir(self.root / "c_stream")
 
-    def save_to_b_stream(self, source_path: str, user_id: str, file_hash: str) -> Path:
+    @cached_property
+    def tmp(self) -> Path:
+        return self._ensure_dir(self.root / "tmp")
+
+    @staticmethod
+    def _ensure_dir(path: Path) -> Path:
+        # 固定的根目录只在首次访问时创建一次
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def get_b_stream_path(self, user_id: str, file_hash: str) -> Path:
+        """获取原始视频在 B 流中的归档路径（不创建文件）"""
+        # 统一使用 mp4 后缀 (V1简化)
+        return self.b_stream / str(user_id) / f"{file_hash}.mp4"
+
+    def save_to_b_stream(self, source_path: str, user_id: str, file_hash: str, move: bool = False) -> Path:
         """
         保存原始视频到 B 流 (Write-once)
         结构: data/b_stream/{user_id}/{hash}.mp4
+
+        move=True 时直接 rename 源文件（同一文件系统下无需再写一遍磁盘），
+        跨文件系统时退化为 shutil.move。
         """
-        user_dir = self.b_stream / str(user_id)
-        user_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 统一使用 mp4 后缀 (V1简化)
-        target_path = user_dir / f"{file_hash}.mp4"
+        target_path = self.get_b_stream_path(user_id, file_hash)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
         
         if not target_path.exists():
-            shutil.copy2(source_path, target_path)
+            if move:
+                try:
+                    os.rename(source_path, target_path)
+                except OSError:
+                    shutil.move(source_path, target_path)
+            else:
+                shutil.copy2(source_path, target_path)
             # 设置为只读 (Linux/Mac)
             try:
                 os.chmod(target_path, 0o444)
-            except:
+            except OSError:
                 pass
                 
         return target_path
 
+    def prepare_keyframe_dir(self, session_id: str) -> Path:
+        """
+        创建 Session 的关键帧目录（每次抽帧调用一次，之后逐帧 save_keyframe）
+        结构: data/a_stream/{session_id}/keyframes
+        """
+        session_dir = self.a_stream / str(session_id) / "keyframes"
+        session_dir.mkdir(parents=True, exist_ok=True)
+        return session_dir
+
     def save_keyframe(self, session_id: str, filename: str, image_data: np.ndarray) -> Path:
         """
-        保存关键帧到 A 流
+        保存关键帧到 A 流（目录须已由 prepare_keyframe_dir 创建）
         结构: data/a_stream/{session_id}/keyframes/{filename}
         """
         # 1. 构造路径
-        session_dir = self.a_stream / str(session_id) / "keyframes"
-        session_dir.mkdir(parents=True, exist_ok=True)
-        
-        target_path = session_dir / filename
+        target_path = self.get_keyframe_path(session_id, filename)
         
         # 2. 保存图片 (使用 OpenCV)
-        # 确保目录存在
         if not cv2.imwrite(str(target_path), image_data):
             raise IOError(f"Failed to save image to {target_path}")
             
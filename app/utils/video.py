@@ -6,7 +6,7 @@
 import cv2
 import os
 from pathlib import Path
-from typing import Tuple, Optional
+from typing import Iterable, Iterator, Tuple, Optional
 import numpy as np
 
 class VideoProcessor:
@@ -49,6 +49,33 @@ class VideoProcessor:
             return frame
         return None
 
+    def iter_frames_at(self, frame_indices: Iterable[int]) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        顺序解码一遍视频，按索引升序产出指定帧
+
+        跳过的帧只 grab 不做颜色转换；与逐个 get_frame 相比避免了每次
+        seek 都从前一个关键帧重新解码。读到视频末尾时提前结束。
+
+        :param frame_indices: 需要的帧索引（可无序、可重复）
+        :return: (帧索引, 帧) 迭代器
+        """
+        targets = sorted(set(frame_indices))
+        if not targets:
+            return
+
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        position = 0
+        for index in targets:
+            while position < index:
+                if not self.cap.grab():
+                    return
+                position += 1
+            ret, frame = self.cap.read()
+            if not ret:
+                return
+            position += 1
+            yield index, frame
+
     def release(self):
         """释放资源"""
         if self.cap:
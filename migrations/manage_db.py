@@ -123,6 +123,7 @@ CREATE TABLE IF NOT EXISTS a_user_events (
 
 CREATE INDEX IF NOT EXISTS idx_user_events_user_id ON a_user_events(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_events_event_date ON a_user_events(event_date);
+CREATE INDEX IF NOT EXISTS idx_user_events_user_date ON a_user_events(user_id, event_date);
 
 -- 创建 a_concern_points 表
 CREATE TABLE IF NOT EXISTS a_concern_points (
@@ -151,6 +152,7 @@ CREATE TABLE IF NOT EXISTS a_concern_points (
 
 CREATE INDEX IF NOT EXISTS idx_concern_points_user_id ON a_concern_points(user_id);
 CREATE INDEX IF NOT EXISTS idx_concern_points_status ON a_concern_points(status);
+CREATE INDEX IF NOT EXISTS idx_concern_points_user_status ON a_concern_points(user_id, status);
 
 -- 创建 updated_at 触发器
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -180,6 +182,17 @@ SET extraction_reason = ''
 WHERE extraction_reason IS NULL;
 """
 
+# 4. V4 迁移 SQL (证据包 cache_key、Session 复合索引)
+V4_MIGRATION_SQL = """
+-- 添加生成输入摘要字段到 a_evidence_packs 表
+ALTER TABLE a_evidence_packs
+ADD COLUMN IF NOT EXISTS cache_key VARCHAR(64);
+
+-- 用户 + 类型 + 状态 + 时间倒序复合索引（最近完成的 Session / 基线帧查询）
+CREATE INDEX IF NOT EXISTS idx_a_sessions_user_type_status_created
+ON a_sessions(user_id, session_type, processing_status, created_at DESC);
+"""
+
 
 def get_engine():
     """获取数据库引擎"""
@@ -253,6 +266,13 @@ def init_db(force=False):
             conn.commit()
         print("   ✓ V3 扩展完成")
 
+        # 应用 V4 迁移
+        print("6. 应用 V4 扩展...")
+        with engine.connect() as conn:
+            conn.execute(text(V4_MIGRATION_SQL))
+            conn.commit()
+        print("   ✓ V4 扩展完成")
+
         print("\n" + "=" * 60)
         print("数据库初始化完成！")
         print("=" * 60)
@@ -291,8 +311,14 @@ def migrate_db():
             conn.commit()
         print("   ✓ V3 迁移完成")
 
+        print("\n3. 应用 V4 迁移 (证据包字段)...")
+        with engine.connect() as conn:
+            conn.execute(text(V4_MIGRATION_SQL))
+            conn.commit()
+        print("   ✓ V4 迁移完成")
+
         # 确保触发器存在
-        print("\n3. 检查并创建触发器...")
+        print("\n4. 检查并创建触发器...")
         with engine.connect() as conn:
             conn.execute(text(INIT_SQL))
             conn.commit()
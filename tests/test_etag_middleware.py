@@ -0,0 +1,84 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+ETag 中间件测试
+
+验证小体积 JSON 响应的 ETag / If-None-Match 304，以及大响应、非 JSON 与流式响应透传
+"""
+import sys
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api.middleware import ETagMiddleware
+
+
+def _make_client(max_body_size: int = ETagMiddleware.DEFAULT_MAX_BODY_SIZE) -> TestClient:
+    app = FastAPI()
+    app.add_middleware(ETagMiddleware, max_body_size=max_body_size)
+
+    @app.get("/small")
+    def small():
+        return JSONResponse({"status": "ok"})
+
+    @app.get("/large")
+    def large():
+        return JSONResponse({"data": "x" * 2048})
+
+    @app.get("/page")
+    def page():
+        return HTMLResponse("<html></html>")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b'{"a":', b"1}"]), media_type="application/json")
+
+    @app.post("/small")
+    def post_small():
+        return JSONResponse({"status": "ok"})
+
+    return TestClient(app)
+
+
+def test_matching_if_none_match_returns_304():
+    """测试：携带匹配的 If-None-Match 时返回 304 且无响应体"""
+    client = _make_client()
+
+    first = client.get("/small")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+
+    cached = client.get("/small", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+
+    # 弱校验形式与多值列表同样命中
+    weak = client.get("/small", headers={"If-None-Match": f'"other", W/{etag}'})
+    assert weak.status_code == 304
+
+
+def test_mismatched_if_none_match_returns_body():
+    """测试：ETag 不匹配时返回完整响应"""
+    client = _make_client()
+
+    response = client.get("/small", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+def test_large_non_json_and_streamed_responses_pass_through():
+    """测试：超过上限、非 JSON、流式（无 Content-Length）与非 GET 响应不计算 ETag"""
+    client = _make_client(max_body_size=1024)
+
+    for path in ("/large", "/page", "/stream"):
+        response = client.get(path, headers={"If-None-Match": "*"})
+        assert response.status_code == 200, path
+        assert "etag" not in response.headers, path
+
+    assert "etag" not in client.post("/small").headers
@@ -9,12 +9,16 @@ import sys
 import os
 import json
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import literal, select, TIMESTAMP
+from sqlalchemy.exc import OperationalError
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.core.evidence_pack import EvidencePackGenerator, EvidencePackError
+from app.core.evidence_pack import EvidencePackGenerator, EvidencePackError, _pack_cache
 from app.core.frame_matcher import FrameMatcherService
 from app.models.database import (
     SessionLocal, ASession, BRawVideo, AKeyframe, AEvidencePack,
@@ -418,6 +422,78 @@ def test_error_handling():
         db.close()
 
 
+class _NoQueryDB:
+    """任何查询都视为失败的数据库会话替身，用于确认缓存命中不访问数据库"""
+
+    def query(self, *args, **kwargs):
+        raise AssertionError("缓存命中时不应查询数据库")
+
+
+def _make_sample_pack(session_id: str) -> EvidencePack:
+    return EvidencePack(
+        session_id=session_id,
+        user_id=TEST_USER_ID,
+        session_type="quick_check",
+        created_at="2025-01-23T10:30:00",
+        total_frames=1,
+        frames=[
+            KeyframeData(
+                frame_id="frame-1",
+                image_url="/data/a_stream/frame_1.jpg",
+                timestamp="00:01.00",
+                extraction_strategy="uniform_sampled",
+                meta_tags=FrameMetaTags(
+                    side=ToothSide.UPPER,
+                    tooth_type=ToothType.POSTERIOR,
+                    region=Region.OCCLUSAL,
+                    detected_issues=[DetectedIssue.NONE],
+                    confidence_score=0.8
+                )
+            )
+        ]
+    )
+
+
+def test_evidence_pack_cache_hit_skips_db():
+    """测试: 缓存命中不查询数据库，且返回的对象彼此独立"""
+    session_id = "cache-test-session"
+    pack = _make_sample_pack(session_id)
+    _pack_cache.put(session_id, pack)
+    try:
+        generator = EvidencePackGenerator(_NoQueryDB())
+        first = generator.get_evidence_pack_by_session(session_id)
+        assert first == pack
+
+        # 修改返回对象与写入缓存的原对象都不影响后续命中
+        first.frames.clear()
+        pack.user_id = "mutated"
+        second = generator.get_evidence_pack_by_session(session_id)
+        assert len(second.frames) == 1
+        assert second.user_id == TEST_USER_ID
+    finally:
+        _pack_cache.invalidate(session_id)
+
+
+def test_days_since_matches_timedelta_days():
+    """测试: 数据库端天数差与 Python timedelta.days 一致（含未来时间的负区间）"""
+    now = datetime(2025, 1, 23, 10, 30, 0)
+    offsets = [timedelta(hours=12), timedelta(days=1, hours=12), timedelta(0),
+               timedelta(hours=-12), timedelta(days=-1, hours=-12)]
+
+    db = SessionLocal()
+    try:
+        for offset in offsets:
+            value = now - offset
+            expr = EvidencePackGenerator._days_since(now, literal(value, TIMESTAMP))
+            try:
+                days = db.execute(select(expr)).scalar()
+            except OperationalError:
+                pytest.skip("PostgreSQL 不可用")
+            assert days == (now - value).days, offset
+    finally:
+        db.close()
+
+
 def cleanup_test_data():
     """清理测试数据"""
     print("\n" + "="*60)
@@ -131,6 +131,65 @@ def test_batch_analysis(keyframe_dir: str):
         print(f"  平均置信度: {avg_conf:.2f}")
 
 
+def test_color_masks_match_inrange():
+    """测试：查找表一次得到的颜色掩码与逐范围 cv2.inRange 取并集的结果一致"""
+    rng = np.random.default_rng(0)
+    hsv = rng.integers(0, 256, size=(64, 96, 3), dtype=np.uint8)
+    hsv[..., 0] %= 181  # OpenCV 的 H 通道取值 0-180
+    # 补充各阈值边界上的像素，覆盖上下界本身
+    bounds = [b for ranges in KeyframeAnalyzer.COLOR_RANGES.values() for pair in ranges for b in pair]
+    hsv[0, :len(bounds)] = np.array(bounds, dtype=np.uint8)
+
+    analyzer = KeyframeAnalyzer()
+    masks = analyzer._extract_raw_masks(hsv)
+
+    assert set(masks) == set(KeyframeAnalyzer.COLOR_RANGES)
+    for key, ranges in KeyframeAnalyzer.COLOR_RANGES.items():
+        expected = np.zeros(hsv.shape[:2], dtype=np.uint8)
+        for lower, upper in ranges:
+            expected = cv2.bitwise_or(expected, cv2.inRange(hsv, lower, upper))
+        assert np.array_equal(masks[key], expected), key
+
+
+def _make_oral_frame(width: int, height: int, seed: int) -> np.ndarray:
+    """构造合成口腔图像：上方牙龈、中部牙齿（含牙缝与黄斑）、深色口腔背景"""
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 20, dtype=np.uint8)
+    frame[:int(height * 0.35)] = (150, 150, 230)  # 牙龈粉红
+    tooth_top, tooth_bottom = int(height * 0.35), int(height * 0.8)
+    tooth_width = width // 6
+    for x in range(0, width - tooth_width, tooth_width):
+        frame[tooth_top:tooth_bottom, x + 4:x + tooth_width - 4] = (235, 240, 245)  # 牙齿白色
+    frame[tooth_top + 10:tooth_top + 30, tooth_width + 10:tooth_width + 40] = (60, 200, 220)  # 黄斑
+    noise = rng.integers(-12, 13, size=frame.shape)
+    return np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def test_batch_analysis_matches_single_frame():
+    """测试：批量分析与逐帧 analyze_frame 的结果一致（含同尺寸堆叠、需缩放与无效帧）"""
+    rng = np.random.default_rng(1)
+    frames = [
+        _make_oral_frame(640, 480, seed=0),   # 宽于分析分辨率，先缩放
+        _make_oral_frame(480, 360, seed=1),
+        _make_oral_frame(480, 360, seed=2),   # 与上一帧同尺寸，沿行方向堆叠
+        rng.integers(0, 256, size=(360, 480, 3), dtype=np.uint8),  # 随机噪声
+        np.zeros((0, 0, 3), dtype=np.uint8),  # 空帧
+    ]
+
+    analyzer = KeyframeAnalyzer()
+    batch_results = analyzer.analyze_frames_batch(frames)
+
+    assert len(batch_results) == len(frames)
+    # 合成口腔帧须通过有效性检查（未知结果带 debug_info 原因），否则比较的只是未知结果
+    assert all(result.debug_info is None for result in batch_results[:3])
+    for frame, batch in zip(frames, batch_results):
+        single = analyzer.analyze_frame(frame)
+        assert batch.side == single.side
+        assert batch.tooth_type == single.tooth_type
+        assert batch.region == single.region
+        assert batch.detected_issues == single.detected_issues
+        assert batch.confidence_score == single.confidence_score
+
 
 def main():
     """主测试函数"""
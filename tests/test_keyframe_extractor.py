@@ -9,6 +9,7 @@ import sys
 import os
 import cv2
 import uuid
+import numpy as np
 from pathlib import Path
 
 # 添加项目根目录到 Python 路径
@@ -330,6 +331,47 @@ def test_anomaly_detection():
         return False
 
 
+def test_iter_frames_at_yields_requested_indices(tmp_path):
+    """测试: 顺序解码只产出请求的帧索引（升序、去重、越界索引忽略），且帧内容对应正确"""
+    video_path = tmp_path / "indexed.avi"
+    frame_count = 30
+    writer = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for i in range(frame_count):
+        # 每帧为均匀灰度，亮度编码帧索引
+        writer.write(np.full((48, 64, 3), i * 8, dtype=np.uint8))
+    writer.release()
+
+    processor = VideoProcessor(str(video_path))
+    try:
+        frames = list(processor.iter_frames_at([7, 0, 3, 7, 29, frame_count + 10]))
+    finally:
+        processor.release()
+
+    assert [index for index, _ in frames] == [0, 3, 7, 29]
+    for index, frame in frames:
+        assert abs(float(frame.mean()) - index * 8) < 4
+
+
+def test_batch_analysis_failure_falls_back_per_frame():
+    """测试: 批量语义分析失败时逐帧重试，单帧失败只影响该帧"""
+    extractor = KeyframeExtractor(db=None)
+    images = [np.zeros((8, 8, 3), dtype=np.uint8) for _ in range(3)]
+    bad_image = images[1]
+
+    def failing_batch(frames):
+        raise RuntimeError("batch failed")
+
+    def analyze_single(frame):
+        if frame is bad_image:
+            raise RuntimeError("bad frame")
+        return "tags"
+
+    extractor.analyzer.analyze_frames_to_meta_tags = failing_batch
+    extractor.analyzer.analyze_frame_to_meta_tags = analyze_single
+
+    assert extractor._analyze_meta_tags(images) == ["tags", None, "tags"]
+
+
 def cleanup_test_data():
     """清理测试数据"""
     print("\n" + "="*60)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+响应缓存测试
+
+使用内存版 Redis 替身验证 GET 端点缓存命中与写操作后的按用户失效
+"""
+import asyncio
+import fnmatch
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+from pydantic import BaseModel
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.services import cache as cache_module
+from app.services.cache import ResponseCache
+
+
+class FakeRedis:
+    """只实现缓存用到的 get/set/scan_iter/delete 的内存替身"""
+
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value.encode() if isinstance(value, str) else value
+
+    async def scan_iter(self, match):
+        for key in list(self.store):
+            if fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+    async def aclose(self):
+        pass
+
+
+class ProfilePayload(BaseModel):
+    user_id: str
+    version: int
+
+
+def _make_cache(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(cache_module, "aioredis", SimpleNamespace(from_url=lambda url: fake))
+    config = SimpleNamespace(REDIS_URL="redis://cache-test", RESPONSE_CACHE_TTL=30)
+    return ResponseCache(config=lambda: config), fake
+
+
+def test_cache_disabled_without_redis_url():
+    """测试：未配置 REDIS_URL 时直接调用端点"""
+    config = SimpleNamespace(REDIS_URL=None, RESPONSE_CACHE_TTL=30)
+    cache = ResponseCache(config=lambda: config)
+    calls = []
+
+    @cache.cached("extended")
+    def get_profile(user_id: str):
+        calls.append(user_id)
+        return ProfilePayload(user_id=user_id, version=len(calls))
+
+    assert not cache.enabled
+    asyncio.run(get_profile(user_id="u1"))
+    asyncio.run(get_profile(user_id="u1"))
+    assert calls == ["u1", "u1"]
+
+
+def test_write_invalidates_cached_get(monkeypatch):
+    """测试：GET 第二次命中缓存；写操作后该用户缓存失效，下一次 GET 重新查询"""
+    cache, fake = _make_cache(monkeypatch)
+    state = {"version": 1, "reads": 0}
+
+    @cache.cached("extended")
+    def get_profile(user_id: str):
+        state["reads"] += 1
+        return ProfilePayload(user_id=user_id, version=state["version"])
+
+    @cache.invalidates
+    def update_profile(user_id: str):
+        state["version"] += 1
+        return ProfilePayload(user_id=user_id, version=state["version"])
+
+    async def scenario():
+        first = await get_profile(user_id="u1")
+        hit = await get_profile(user_id="u1")
+        other_user = await get_profile(user_id="u2")
+        await update_profile(user_id="u1")
+        after_write = await get_profile(user_id="u1")
+        return first, hit, other_user, after_write
+
+    first, hit, other_user, after_write = asyncio.run(scenario())
+
+    # 首次读取查询端点并写入缓存，第二次直接返回缓存的 JSON
+    assert first.version == 1
+    assert ProfilePayload.model_validate_json(hit.body).version == 1
+    assert state["reads"] == 3  # u1 首次、u2 首次、u1 失效后
+
+    # 写操作只失效 u1 的缓存，u1 下一次读取拿到新数据
+    assert after_write.version == 2
+    assert other_user.version == 1
+    assert any(key.startswith("profile:u2:") for key in fake.store)
+
+
+def test_cache_reads_config_lazily():
+    """测试：缓存配置在首次使用时才读取，构造时不访问配置"""
+    reads = []
+
+    def config():
+        reads.append(True)
+        return SimpleNamespace(REDIS_URL=None, RESPONSE_CACHE_TTL=5)
+
+    cache = ResponseCache(config=config)
+    assert reads == []
+    assert cache.ttl == 5
+    assert reads
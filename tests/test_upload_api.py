@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+上传接口测试
+
+验证上传立即返回 202（status=pending），后台处理管道将 Session 推进到 completed 或 failed。
+数据库与各核心服务以内存替身代替，不依赖 PostgreSQL 与真实视频。
+"""
+import hashlib
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.api import upload
+from app.api.dependencies import get_ingestion_service, get_profile_manager
+from app.core.ingestion import UnsupportedVideoError
+from app.core.keyframe_extractor import ExtractionError
+from app.models.database import get_db
+
+
+class FakeDB:
+    """记录提交/回滚/关闭的数据库会话替身"""
+
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+
+class FakeIngestionService:
+    """摄取服务替身：记录摄取参数与 Session 状态变更"""
+
+    statuses = []
+
+    def __init__(self, db=None):
+        self.db = db
+        self.ingested = []
+
+    def ingest_video(self, **kwargs):
+        self.ingested.append(kwargs)
+        return SimpleNamespace(file_path="/data/b_stream/video.mp4"), SimpleNamespace(id="session-1")
+
+    def update_session_status(self, session_id, status, error_msg=None, commit=True):
+        self.statuses.append((session_id, status, error_msg))
+
+
+def _make_client(tmp_path, monkeypatch, ingestion, scheduled):
+    monkeypatch.setattr(upload, "storage_service", SimpleNamespace(tmp=tmp_path))
+
+    async def record_task(*args):
+        scheduled.append(args)
+
+    monkeypatch.setattr(upload, "_process_session_task", record_task)
+
+    app = FastAPI()
+    app.include_router(upload.router)
+    app.dependency_overrides[get_db] = FakeDB
+    app.dependency_overrides[get_ingestion_service] = lambda: ingestion
+    app.dependency_overrides[get_profile_manager] = lambda: SimpleNamespace(get_baseline_progress=lambda user_id: 3)
+    return TestClient(app)
+
+
+def test_quick_check_upload_returns_202_pending(tmp_path, monkeypatch):
+    """测试：Quick Check 上传返回 202 pending，并调度后台处理"""
+    ingestion = FakeIngestionService()
+    scheduled = []
+    client = _make_client(tmp_path, monkeypatch, ingestion, scheduled)
+
+    # 超过一个上传分块，覆盖多块顺序 Hash
+    payload = bytes(range(256)) * (upload.UPLOAD_CHUNK_SIZE // 256 + 7)
+    response = client.post(
+        "/upload/quick-check",
+        data={"user_id": "user-1", "user_text": "牙龈出血"},
+        files={"video_file": ("clip.mp4", payload, "video/mp4")},
+    )
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "pending"
+    assert body["session_id"] == "session-1"
+    assert ingestion.ingested[0]["session_type"] == "quick_check"
+    # 分块在线程池中计算的 Hash 与整段内容的 SHA-256 一致
+    assert ingestion.ingested[0]["file_hash"] == hashlib.sha256(payload).hexdigest()
+    assert scheduled == [("session-1", "/data/b_stream/video.mp4", "user-1")]
+    # 上传临时文件在摄取后删除
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_baseline_upload_reports_progress(tmp_path, monkeypatch):
+    """测试：基线上传返回 202 pending，并带上已完成的基线进度"""
+    ingestion = FakeIngestionService()
+    scheduled = []
+    client = _make_client(tmp_path, monkeypatch, ingestion, scheduled)
+
+    response = client.post(
+        "/upload/baseline",
+        data={"user_id": "user-1", "zone_id": "4"},
+        files={"video_file": ("clip.mp4", b"\x00" * 1024, "video/mp4")},
+    )
+
+    assert response.status_code == 202
+    body = response.json()
+    assert body["status"] == "pending"
+    assert body["baseline_progress"] == "3/7"
+    assert scheduled == [("session-1", "/data/b_stream/video.mp4", "user-1", 4)]
+
+
+def test_ingest_upload_returns_plain_values_and_rolls_back_on_error():
+    """测试：摄取辅助函数返回纯值；意外错误在线程内回滚，摄取校验错误不回滚"""
+    db = FakeDB()
+    assert upload._ingest_upload(db, FakeIngestionService(), user_id="user-1") == \
+        ("session-1", "/data/b_stream/video.mp4")
+
+    class FailingIngestion:
+        def __init__(self, error):
+            self.error = error
+
+        def ingest_video(self, **kwargs):
+            raise self.error
+
+    for error, rollbacks in ((UnsupportedVideoError("bad"), 0), (OSError("disk full"), 1)):
+        db = FakeDB()
+        with pytest.raises(type(error)):
+            upload._ingest_upload(db, FailingIngestion(error), user_id="user-1")
+        assert db.rollbacks == rollbacks
+
+
+def _patch_pipeline(monkeypatch, db, extract_error=None):
+    """将后台管道的各服务替换为替身，返回记录的档案更新"""
+    FakeIngestionService.statuses = []
+    profile_updates = []
+
+    class FakeExtractor:
+        def __init__(self, db):
+            pass
+
+        def extract_keyframes(self, session_id, video_path, commit=True):
+            if extract_error is not None:
+                raise extract_error
+
+    class FakePackGenerator:
+        def __init__(self, db):
+            pass
+
+        def generate_evidence_pack(self, session_id, commit=True):
+            pass
+
+    class FakeProfileManager:
+        def __init__(self, db):
+            pass
+
+        def record_quick_check(self, user_id, commit=True):
+            profile_updates.append(("quick_check", user_id))
+
+        def mark_baseline_completed(self, user_id, zone_id, session_id, commit=True):
+            profile_updates.append(("baseline", user_id, zone_id))
+
+    monkeypatch.setattr(upload, "SessionLocal", lambda: db)
+    monkeypatch.setattr(upload, "VideoIngestionService", FakeIngestionService)
+    monkeypatch.setattr(upload, "KeyframeExtractor", FakeExtractor)
+    monkeypatch.setattr(upload, "EvidencePackGenerator", FakePackGenerator)
+    monkeypatch.setattr(upload, "ProfileManager", FakeProfileManager)
+    return profile_updates
+
+
+def test_background_processing_completes_session(monkeypatch):
+    """测试：后台管道成功时 Session 依次进入 processing、completed，并一次提交"""
+    db = FakeDB()
+    profile_updates = _patch_pipeline(monkeypatch, db)
+
+    upload._process_session("session-1", "/data/video.mp4", "user-1", zone_id=2)
+
+    assert [status for _, status, _ in FakeIngestionService.statuses] == ["processing", "completed"]
+    assert profile_updates == [("baseline", "user-1", 2)]
+    assert db.commits == 1
+    assert db.rollbacks == 0
+    assert db.closed
+
+
+def test_background_processing_marks_session_failed(monkeypatch):
+    """测试：抽帧失败时回滚未提交结果，并将 Session 标记为 failed"""
+    db = FakeDB()
+    profile_updates = _patch_pipeline(monkeypatch, db, extract_error=ExtractionError("抽帧失败: 视频损坏"))
+
+    upload._process_session("session-1", "/data/video.mp4", "user-1")
+
+    assert FakeIngestionService.statuses[0][1] == "processing"
+    assert FakeIngestionService.statuses[-1] == ("session-1", "failed", "抽帧失败: 视频损坏")
+    assert profile_updates == []
+    assert db.commits == 0
+    assert db.rollbacks == 1
+    assert db.closed